@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+
+# Latency and throughput of the HTTP routes under a realistic request mix.
+#
+#   python -m app.benchmarks.http_latency --database /tmp/bench.db --generate
+#   python -m app.benchmarks.http_latency --database /tmp/bench.db --save
+#   python -m app.benchmarks.http_latency --database /tmp/bench.db --compare
+#
+# The app runs in this process (httpx over ASGI, startup and shutdown
+# included), against a database made by app.data.synthetic. Workers loop
+# over scenarios picked by weight: catalog browsing (a page and sometimes
+# the next one), search, movie detail, a movie's reviews (likewise), login
+# and review writes. Movies are picked by the same Zipf popularity as the
+# generated reviews, so hot movies get most of the traffic.
+#
+# Only requests started after the warm-up are recorded. Results are
+# p50/p95/p99, max, throughput and errors per route. --save writes them to
+# a JSON baseline (stable key order, so a re-run shows up as a readable
+# diff); --compare reads it back, prints the change per route and exits 1
+# when a route's p95 got worse by more than --threshold. Routes with fewer
+# than MIN_SAMPLES requests on either side are shown but never flagged:
+# their p95 is noise.
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "http_latency.json"
+DEFAULT_MIX = "browse=40,search=20,detail=15,reviews=10,login=5,review=10"
+# Password given to generated users so the login scenario can succeed
+BENCH_PASSWORD = "benchmark-password"
+PERCENTILES = (50, 95, 99)
+MIN_SAMPLES = 200
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario {name!r}, expected one of {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        # perf_counter() value the measured window starts at
+        self.record_from = None
+
+    async def request(self, client, method: str, url: str, route: str, expected=(200,), **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        if self.record_from is not None and started >= self.record_from:
+            self.latencies.setdefault(route, []).append(elapsed)
+            if response.status_code not in expected:
+                self.errors[route] = self.errors.get(route, 0) + 1
+        return response
+
+    def summary(self, seconds: float) -> dict:
+        routes = {}
+        for route, latencies in sorted(self.latencies.items()):
+            values = np.array(latencies) * 1000
+            routes[route] = {
+                "requests": len(values),
+                "errors": self.errors.get(route, 0),
+                "throughput": round(len(values) / seconds, 1),
+                **{f"p{p}_ms": round(float(np.percentile(values, p)), 2) for p in PERCENTILES},
+                "max_ms": round(float(values.max()), 2),
+            }
+        return routes
+
+
+class Workload:
+    # What the scenarios pick from, read once from the database
+    def __init__(self, conn: sqlite3.Connection, zipf: float):
+        from app.data.synthetic import ADJECTIVES, NOUNS, zipf_weights
+
+        self.movie_ids = [row[0] for row in conn.execute("SELECT id FROM movies ORDER BY review_count DESC, id")]
+        self.movie_cdf = np.minimum(np.cumsum(zipf_weights(len(self.movie_ids), zipf)), 1.0)
+        self.genres = [row[0] for row in conn.execute("SELECT name FROM genres ORDER BY id")]
+        self.emails = [row[0] for row in conn.execute(
+            "SELECT email FROM users WHERE email LIKE 'synth\\_%' ESCAPE '\\' ORDER BY id"
+        )]
+        self.words = [word.lower() for word in ADJECTIVES + NOUNS]
+        self.tokens = []
+
+    def movie(self, rng: random.Random) -> int:
+        return self.movie_ids[int(np.searchsorted(self.movie_cdf, rng.random()))]
+
+
+async def browse(client, recorder: Recorder, workload: Workload, rng: random.Random):
+    params = {
+        "genre": rng.choice(workload.genres + ["All Genres"] * 3),
+        "sort": rng.choice(["title", "year", "rating", "rating"]),
+        "limit": 24,
+    }
+    if rng.random() < 0.3:
+        params["year"] = str(rng.choice(range(1920, 2030, 10)))
+    response = await recorder.request(client, "GET", "/movies/", "GET /movies/", params=params)
+    cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+    if cursor and rng.random() < 0.4:
+        await recorder.request(client, "GET", "/movies/", "GET /movies/ (next page)", params={**params, "cursor": cursor})
+
+
+async def search(client, recorder: Recorder, workload: Workload, rng: random.Random):
+    words = rng.sample(workload.words, rng.choice([1, 1, 2]))
+    if rng.random() < 0.3:
+        # Typed so far: a prefix
+        words[-1] = words[-1][:3]
+    await recorder.request(client, "GET", "/movies/search/", "GET /movies/search/", params={"query": " ".join(words)})
+
+
+async def detail(client, recorder: Recorder, workload: Workload, rng: random.Random):
+    movie_id = workload.movie(rng)
+    await recorder.request(client, "GET", f"/api/movies/{movie_id}", "GET /api/movies/{id}")
+
+
+async def reviews(client, recorder: Recorder, workload: Workload, rng: random.Random):
+    movie_id = workload.movie(rng)
+    path, params = f"/api/movies/{movie_id}/reviews", {"limit": 50}
+    response = await recorder.request(client, "GET", path, "GET /api/movies/{id}/reviews", params=params)
+    page = response.json() if response.status_code == 200 else []
+    if len(page) == params["limit"] and rng.random() < 0.4:
+        await recorder.request(
+            client, "GET", path, "GET /api/movies/{id}/reviews (next page)",
+            params={**params, "before": page[-1]["id"]}
+        )
+
+
+async def login(client, recorder: Recorder, workload: Workload, rng: random.Random):
+    # 503 is the password pool shedding load, which is the expected answer
+    # under pressure; it is still counted, just not as an error
+    await recorder.request(
+        client, "POST", "/token", "POST /token", expected=(200, 503),
+        data={"username": rng.choice(workload.emails), "password": BENCH_PASSWORD}
+    )
+
+
+async def review(client, recorder: Recorder, workload: Workload, rng: random.Random):
+    movie_id = workload.movie(rng)
+    await recorder.request(
+        client, "POST", f"/api/movies/{movie_id}/reviews", "POST /api/movies/{id}/reviews",
+        json={"rating": rng.choice([1, 2, 3, 3, 4, 4, 4, 5, 5]), "comment": "benchmark"},
+        headers={"Authorization": f"Bearer {rng.choice(workload.tokens)}"}
+    )
+
+
+SCENARIOS = {
+    "browse": browse, "search": search, "detail": detail, "reviews": reviews, "login": login, "review": review
+}
+
+
+async def run(app, workload: Workload, mix: dict, concurrency: int, seconds: float, warmup: float, seed: int) -> dict:
+    import httpx
+
+    recorder = Recorder()
+    names, weights = list(mix), list(mix.values())
+    await app.router.startup()
+    try:
+        # Unhandled errors come back as 500s and are counted, not raised
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            # Tokens for the review writes, outside the measured window
+            for email in workload.emails[:min(len(workload.emails), 20)]:
+                response = await client.post("/token", data={"username": email, "password": BENCH_PASSWORD})
+                if response.status_code == 200:
+                    workload.tokens.append(response.json()["access_token"])
+            if not workload.tokens and "review" in mix:
+                raise SystemExit(f"Could not log in as a generated user; generate the dataset with --password {BENCH_PASSWORD}")
+
+            recorder.record_from = time.perf_counter() + warmup
+            deadline = recorder.record_from + seconds
+
+            async def worker(index: int):
+                rng = random.Random(seed * 1000 + index)
+                while time.perf_counter() < deadline:
+                    scenario = SCENARIOS[rng.choices(names, weights)[0]]
+                    await scenario(client, recorder, workload, rng)
+
+            await asyncio.gather(*(worker(index) for index in range(concurrency)))
+            # Requests started before the deadline are waited for
+            measured = time.perf_counter() - recorder.record_from
+    finally:
+        await app.router.shutdown()
+    return recorder.summary(measured)
+
+
+def compare(baseline: dict, result: dict, threshold: float) -> list:
+    regressions = []
+    print(f"\n{'route':<42} {'p50':>22} {'p95':>22} {'p99':>22} {'req/s':>22}")
+    for route, current in result["routes"].items():
+        before = baseline.get("routes", {}).get(route)
+        if before is None:
+            print(f"{route:<42} (not in baseline)")
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput"):
+            change = (current[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            cells.append(f"{before[key]:g} -> {current[key]:g} ({change:+.0f}%)")
+        few = min(before["requests"], current["requests"]) < MIN_SAMPLES
+        print(f"{route:<42} " + " ".join(f"{cell:>22}" for cell in cells) + ("  (too few samples)" if few else ""))
+        if not few and before["p95_ms"] and current["p95_ms"] > before["p95_ms"] * (1 + threshold / 100):
+            regressions.append(route)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process HTTP latency benchmark")
+    parser.add_argument("--database", default="bench.db", help="SQLite file made by app.data.synthetic")
+    parser.add_argument("--generate", action="store_true", help="(re)generate the dataset first")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--movies", type=int, default=5_000)
+    parser.add_argument("--reviews", type=int, default=1_000_000)
+    parser.add_argument("--data-seed", type=int, default=42)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help=f"scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--zipf", type=float, default=1.07, help="movie popularity exponent for the picks")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--compare", action="store_true", help="compare with --baseline, exit 1 on regressions")
+    # Identical runs differ by up to ~25% at p95 on a shared machine; a lost
+    # index or a per-row query costs multiples
+    parser.add_argument("--threshold", type=float, default=50.0, help="allowed p95 increase, in percent")
+    args = parser.parse_args()
+    mix = args.mix
+
+    # The app reads its settings at import time
+    database = Path(args.database).resolve()
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ.setdefault("RECOMMENDATION_JOB_ENABLED", "0")
+    os.environ.setdefault("TRENDING_SNAPSHOT_PATH", "")
+
+    if args.generate or not database.exists():
+        from app.data.synthetic import generate
+        from app.database import engine
+        from app.database.init_db import init_db
+
+        if database.exists():
+            engine.dispose()
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{database}{suffix}").unlink(missing_ok=True)
+        init_db()
+        stats = generate(
+            engine, args.users, args.movies, args.reviews, seed=args.data_seed,
+            end=datetime(2026, 1, 1, tzinfo=timezone.utc), password=BENCH_PASSWORD
+        )
+        print(f"Generated {stats.movies} movies, {stats.users} users and {stats.reviews} reviews")
+
+    from app.main import app
+
+    with sqlite3.connect(database) as conn:
+        workload = Workload(conn, args.zipf)
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("movies", "users", "reviews")
+        }
+    print(
+        f"{counts['movies']} movies, {counts['users']} users, {counts['reviews']} reviews; "
+        f"{args.concurrency} workers for {args.seconds}s after {args.warmup}s warm-up"
+    )
+    routes = asyncio.run(run(app, workload, mix, args.concurrency, args.seconds, args.warmup, args.seed))
+
+    print(f"\n{'route':<42} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for route, row in routes.items():
+        print(
+            f"{route:<42} {row['requests']:>9} {row['throughput']:>8} {row['p50_ms']:>8} "
+            f"{row['p95_ms']:>8} {row['p99_ms']:>8} {row['max_ms']:>8} {row['errors']:>7}"
+        )
+
+    result = {
+        "dataset": counts,
+        "settings": {
+            "mix": mix,
+            "concurrency": args.concurrency,
+            "seconds": args.seconds,
+            "warmup": args.warmup,
+            "seed": args.seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "recorded_at": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+        },
+        "routes": routes,
+    }
+
+    if args.compare:
+        if not args.baseline.exists():
+            raise SystemExit(f"No baseline at {args.baseline}; run with --save first")
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("settings") != result["settings"]:
+            print(f"\nNote: the baseline was recorded with different settings: {baseline.get('settings')}")
+        regressions = compare(baseline, result, args.threshold)
+        if regressions:
+            print(f"\np95 regressed by more than {args.threshold:g}%: {', '.join(regressions)}")
+            sys.exit(1)
+    if args.save:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(result, indent=2, sort_keys=True) + "\n")
+        print(f"\nSaved baseline to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
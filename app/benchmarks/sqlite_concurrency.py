@@ -0,0 +1,134 @@
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, text
+from app.database import Base
+from app.database.sqlite import DEFAULT_SQLITE_PROFILE, SQLiteProfile, apply_sqlite_profile
+from app import models  # noqa: F401  (registers the tables on Base.metadata)
+
+# Read throughput of the catalog queries while a writer commits reviews,
+# under SQLite's default rollback journal and under the WAL profile.
+#
+#   python -m app.benchmarks.sqlite_concurrency --readers 4 --seconds 5
+
+READ_QUERIES = [
+    "SELECT id, title, rating_average, review_count FROM movies "
+    "ORDER BY rating_average DESC, id DESC LIMIT 24",
+    "SELECT id, rating, comment FROM reviews WHERE movie_id = :movie_id",
+]
+
+
+def build_database(path: str, movies: int, reviews: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO users (id, email, username, hashed_password) VALUES (1, 'bench@example.com', 'bench', '!')")
+        )
+        conn.execute(
+            text("INSERT INTO movies (id, title, director, year, rating_sum, rating_average, review_count) "
+                 "VALUES (:id, :title, 'Director', :year, 0, 0, 0)"),
+            [{"id": i, "title": f"Movie {i}", "year": 1950 + i % 75} for i in range(1, movies + 1)]
+        )
+        conn.execute(
+            text("INSERT INTO reviews (rating, comment, user_id, movie_id) VALUES (:rating, 'bench', 1, :movie_id)"),
+            [{"rating": rng.randint(1, 5), "movie_id": rng.randint(1, movies)} for _ in range(reviews)]
+        )
+    engine.dispose()
+
+
+def run_profile(path: str, profile: SQLiteProfile, movies: int, readers: int, seconds: float, with_writer: bool) -> dict:
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}, **profile.pool_options()
+    )
+    apply_sqlite_profile(engine, profile)
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+    errors = [0]
+
+    def reader(index: int):
+        rng = random.Random(index)
+        with engine.connect() as conn:
+            while not stop.is_set():
+                try:
+                    for query in READ_QUERIES:
+                        conn.execute(text(query), {"movie_id": rng.randint(1, movies)}).all()
+                    conn.commit()
+                    reads[index] += 1
+                except Exception:
+                    errors[0] += 1
+                    conn.rollback()
+
+    def writer():
+        rng = random.Random(-1)
+        with engine.connect() as conn:
+            while not stop.is_set():
+                movie_id = rng.randint(1, movies)
+                rating = rng.randint(1, 5)
+                try:
+                    conn.execute(
+                        text("INSERT INTO reviews (rating, comment, user_id, movie_id) VALUES (:r, 'bench', 1, :m)"),
+                        {"r": rating, "m": movie_id}
+                    )
+                    conn.execute(
+                        text("UPDATE movies SET rating_sum = rating_sum + :r, review_count = review_count + 1, "
+                             "rating_average = (rating_sum + :r) / (review_count + 1) WHERE id = :m"),
+                        {"r": rating, "m": movie_id}
+                    )
+                    conn.commit()
+                    writes[0] += 1
+                except Exception:
+                    errors[0] += 1
+                    conn.rollback()
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    if with_writer:
+        threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        "reads_per_sec": sum(reads) / seconds,
+        "writes_per_sec": writes[0] / seconds,
+        "errors": errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite read throughput under concurrent writes")
+    parser.add_argument("--movies", type=int, default=20000)
+    parser.add_argument("--reviews", type=int, default=200000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    profiles = {
+        "rollback journal (SQLite defaults)": DEFAULT_SQLITE_PROFILE,
+        "WAL profile": SQLiteProfile.from_env(),
+    }
+    print(f"{args.movies} movies, {args.reviews} reviews, {args.readers} reader threads, {args.seconds}s per run")
+    print(f"{'profile':<36} {'writer':<7} {'reads/s':>10} {'writes/s':>10} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, profile in profiles.items():
+            path = os.path.join(tmp, f"{profile.journal_mode.lower()}.db")
+            build_database(path, args.movies, args.reviews)
+            for with_writer in (False, True):
+                result = run_profile(path, profile, args.movies, args.readers, args.seconds, with_writer)
+                print(
+                    f"{name:<36} {'yes' if with_writer else 'no':<7} "
+                    f"{result['reads_per_sec']:>10.0f} {result['writes_per_sec']:>10.0f} {result['errors']:>7}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import logging
+import os
+import time
+from sqlalchemy import text
+from app.database import SessionLocal, async_engine
+from app.database.aggregates import refresh_rating_prior
+from app.database.init_db import init_db, seed_data
+from app.database.migrations import MIGRATIONS
+from app.database.sqlite import begin_immediate
+from app.static_assets import build_static_assets
+
+# Everything that writes to the database or the filesystem before the app
+# can serve: schema, migrations, FTS index, sample data, the rating prior
+# and the static build. Each step is idempotent, so the command is safe to run on every
+# deploy. Workers only check that it has been run.
+#
+#   python -m app.bootstrap
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+# Measured from the top of the app.main import to the end of the startup
+# hook; over budget is logged, or fails startup with STARTUP_BUDGET_STRICT=1
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "250"))
+STARTUP_BUDGET_STRICT = os.getenv("STARTUP_BUDGET_STRICT", "0") == "1"
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseNotReady(RuntimeError):
+    pass
+
+
+class StartupBudgetExceeded(RuntimeError):
+    pass
+
+
+def bootstrap():
+    init_db()
+    db = SessionLocal()
+    try:
+        seed_data(db)
+        # Migrations compute the prior before there is any data to base it on
+        begin_immediate(db.connection())
+        refresh_rating_prior(db)
+        db.commit()
+    finally:
+        db.close()
+    return build_static_assets()
+
+
+async def check_database_ready():
+    # One read, no DDL: the schema must be at the version this code expects
+    async with async_engine.connect() as conn:
+        version = (await conn.execute(text("PRAGMA user_version"))).scalar()
+    if version != SCHEMA_VERSION:
+        raise DatabaseNotReady(
+            f"Database schema is at version {version}, expected {SCHEMA_VERSION}; "
+            "run `python -m app.bootstrap` first"
+        )
+
+
+def check_startup_budget(elapsed_ms: float):
+    if elapsed_ms <= STARTUP_BUDGET_MS:
+        return elapsed_ms
+    message = f"Startup took {elapsed_ms:.0f} ms, over the {STARTUP_BUDGET_MS:.0f} ms budget"
+    if STARTUP_BUDGET_STRICT:
+        raise StartupBudgetExceeded(message)
+    logger.warning(message)
+    return elapsed_ms
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    built = bootstrap()
+    print(
+        f"Database at schema version {SCHEMA_VERSION}, {len(built)} static assets built "
+        f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
@@ -0,0 +1,88 @@
+import asyncio
+import sys
+import httpx
+
+# Checks for the movie list cache in app/main.py: a review must not drop
+# cached pages whose movies and order it can't change. Run on a scratch
+# copy of the configured database, since it writes a review.
+#
+#   python -m app.cache_checks
+
+
+async def _write_review(movie_id: int):
+    # What POST /reviews/ does inside its transaction
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.database.aggregates import record_rating
+    from app.models.models import Review, User
+
+    async with AsyncSessionLocal() as db, db.begin():
+        user_id = await db.scalar(select(User.id).limit(1))
+        db.add(Review(rating=5, comment="cache check", user_id=user_id, movie_id=movie_id))
+        await record_rating(db, movie_id, 5)
+
+
+async def check_review_invalidation(app) -> dict:
+    # Returns {check name: problem} for every expectation that failed
+    from app.main import movie_list_cache
+
+    async def fetch(path: str) -> tuple:
+        # (page items, whether the cache answered)
+        hits = movie_list_cache.hits
+        response = await client.get(path)
+        response.raise_for_status()
+        return response.json()["items"], movie_list_cache.hits > hits
+
+    failures = {}
+    movie_list_cache.clear()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        unrelated = "/movies/?sort=title&limit=5"
+        first_page, _ = await fetch(unrelated)
+        last_page, _ = await fetch("/movies/?sort=title&limit=100")
+        movie = last_page[-1]
+        if movie["id"] in {item["id"] for item in first_page}:
+            return {"setup": "need more than 5 movies"}
+        containing = f"/movies/?search={movie['title']}&sort=title&limit=5"
+        by_rating = "/movies/?sort=rating&limit=5"
+        await fetch(containing)
+        await fetch(by_rating)
+
+        await _write_review(movie["id"])
+
+        _, hit = await fetch(unrelated)
+        if not hit:
+            failures["unrelated page stays cached"] = "title-sorted page was rebuilt after a review"
+        items, hit = await fetch(containing)
+        reviewed = next((item for item in items if item["id"] == movie["id"]), None)
+        if not hit:
+            failures["page with the movie stays cached"] = "page was rebuilt after a review"
+        if reviewed is None or reviewed["review_count"] != movie["review_count"] + 1:
+            failures["page with the movie shows the review"] = (
+                f"review_count {movie['review_count']} -> {reviewed and reviewed['review_count']}"
+            )
+        _, hit = await fetch(by_rating)
+        if hit:
+            failures["rating-sorted page is rebuilt"] = "served from the cache after a review"
+    return failures
+
+
+CHECKS = (
+    "unrelated page stays cached",
+    "page with the movie stays cached",
+    "page with the movie shows the review",
+    "rating-sorted page is rebuilt",
+)
+
+
+if __name__ == "__main__":
+    from app.scratch_db import scratch_database
+
+    with scratch_database():
+        from app.main import app
+
+        failures = asyncio.run(check_review_invalidation(app))
+    for name in ("setup",) if "setup" in failures else CHECKS:
+        print(f"{'FAIL' if name in failures else 'ok':<5} {name}")
+        if name in failures:
+            print(f"      {failures[name]}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,199 @@
+import argparse
+import csv
+import json
+import time
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection, Engine
+from app.database.aggregates import unreviewed_score
+from app.database.fts import bulk_insert_movies
+from app.database.sqlite import begin_immediate
+from app.models.models import Genre, Movie
+
+# Streaming catalog import for CSV and JSONL movie dumps.
+#
+#   python -m app.data.catalog_import movies.jsonl
+#   python -m app.data.catalog_import movies.csv --genre-separator "|"
+#
+# Rows are read lazily and written in batches: one executemany INSERT for
+# the movies, one for any genres not seen before and one for the
+# movie_genre links, then a commit. Genre names are resolved through an
+# in-memory name -> id map loaded once, and movie ids are assigned here
+# (or taken from an "id" column) so the links never need a read-back. The
+# search index is filled per batch rather than through its row trigger.
+#
+# Recognised fields: id (optional), title, director, year, synopsis and
+# genres (a list in JSONL, a separator-joined string in CSV). Rows
+# without a title are skipped; an empty director or year is stored as NULL.
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def insert_sql(table: str, columns, verb: str = "INSERT") -> str:
+    # Driver-level executemany with named parameters; going through the
+    # SQLAlchemy compiler costs more per row than SQLite does
+    names = ", ".join(columns)
+    params = ", ".join(f":{column}" for column in columns)
+    return f"{verb} INTO {table} ({names}) VALUES ({params})"
+
+
+MOVIE_INSERT = insert_sql(
+    "movies",
+    ("id", "title", "director", "year", "synopsis", "rating_sum", "rating_average", "review_count", "weighted_score")
+)
+GENRE_INSERT = insert_sql("genres", ("id", "name"))
+# OR IGNORE: a genre listed twice for the same movie is one link
+MOVIE_GENRE_INSERT = insert_sql("movie_genre", ("movie_id", "genre_id"), "INSERT OR IGNORE")
+
+
+@dataclass
+class ImportStats:
+    movies: int = 0
+    skipped: int = 0
+    genres_created: int = 0
+    links: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.movies / self.seconds if self.seconds else 0.0
+
+
+def read_rows(path: Path, format: str = None):
+    format = format or path.suffix.lstrip(".").lower()
+    with path.open(newline="", encoding="utf-8") as source:
+        if format == "csv":
+            yield from csv.DictReader(source)
+        elif format in ("jsonl", "ndjson"):
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported catalog format {format!r}, expected csv or jsonl")
+
+
+def _parse_genres(value, separator: str) -> list:
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(separator)
+    return [name.strip() for name in value if name and name.strip()]
+
+
+def _parse_int(value):
+    if value in (None, ""):
+        return None
+    return int(value)
+
+
+class CatalogImporter:
+    def __init__(self, conn: Connection, genre_separator: str = "|"):
+        self.conn = conn
+        self.genre_separator = genre_separator
+        # Lower-cased so "Drama" and "drama" are the same genre
+        self.genre_ids = {
+            name.lower(): genre_id
+            for genre_id, name in conn.execute(select(Genre.id, Genre.name))
+        }
+        self.next_movie_id = 1
+        self.next_genre_id = 1
+
+    def import_batch(self, rows, stats: ImportStats):
+        # The batch is one explicit transaction, begun before the ids are
+        # read, so rows the app adds meanwhile can't take them (a duplicate
+        # id from the file fails the batch instead of being silently skipped)
+        begin_immediate(self.conn)
+        weighted_score = unreviewed_score(self.conn)
+        self.next_movie_id = max(self.next_movie_id, (self.conn.execute(select(func.max(Movie.id))).scalar() or 0) + 1)
+        self.next_genre_id = max(self.next_genre_id, (self.conn.execute(select(func.max(Genre.id))).scalar() or 0) + 1)
+        movies, new_genres, links = [], [], []
+        for row in rows:
+            title = (row.get("title") or "").strip()
+            if not title:
+                stats.skipped += 1
+                continue
+            movie_id = _parse_int(row.get("id"))
+            if movie_id is None:
+                movie_id = self.next_movie_id
+            self.next_movie_id = max(self.next_movie_id, movie_id + 1)
+            movies.append({
+                "id": movie_id,
+                "title": title,
+                "director": row.get("director") or None,
+                "year": _parse_int(row.get("year")),
+                "synopsis": row.get("synopsis") or None,
+                "rating_sum": 0.0,
+                "rating_average": 0.0,
+                "review_count": 0,
+                "weighted_score": weighted_score,
+            })
+            for name in _parse_genres(row.get("genres"), self.genre_separator):
+                genre_id = self.genre_ids.get(name.lower())
+                if genre_id is None:
+                    genre_id = self.genre_ids[name.lower()] = self.next_genre_id
+                    self.next_genre_id += 1
+                    new_genres.append({"id": genre_id, "name": name})
+                links.append({"movie_id": movie_id, "genre_id": genre_id})
+
+        if new_genres:
+            self.conn.exec_driver_sql(GENRE_INSERT, new_genres)
+        if movies:
+            bulk_insert_movies(self.conn, MOVIE_INSERT, movies)
+        if links:
+            self.conn.exec_driver_sql(MOVIE_GENRE_INSERT, links)
+        stats.movies += len(movies)
+        stats.genres_created += len(new_genres)
+        stats.links += len(links)
+
+
+def import_catalog(engine: Engine, rows, batch_size: int = DEFAULT_BATCH_SIZE,
+                   genre_separator: str = "|", progress=None) -> ImportStats:
+    stats = ImportStats()
+    started = time.perf_counter()
+    rows = iter(rows)
+    with engine.connect() as conn:
+        importer = CatalogImporter(conn, genre_separator)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            importer.import_batch(batch, stats)
+            conn.commit()
+            stats.seconds = time.perf_counter() - started
+            if progress:
+                progress(stats)
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def main():
+    from app.database import engine
+
+    parser = argparse.ArgumentParser(description="Import a CSV or JSONL movie catalog")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--genre-separator", default="|")
+    args = parser.parse_args()
+
+    def progress(stats: ImportStats):
+        print(f"\r{stats.movies} movies, {stats.rows_per_second:.0f} rows/s", end="", flush=True)
+
+    stats = import_catalog(
+        engine,
+        read_rows(args.path, args.format),
+        batch_size=args.batch_size,
+        genre_separator=args.genre_separator,
+        progress=progress
+    )
+    print(
+        f"\rImported {stats.movies} movies ({stats.skipped} skipped), "
+        f"{stats.genres_created} new genres and {stats.links} genre links "
+        f"in {stats.seconds:.1f}s ({stats.rows_per_second:.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import asyncio
+import sys
+import httpx
+
+# Catalog import round trip: rows imported by app.data.catalog_import,
+# including ones with an empty director or year, must read back through
+# the API. Runs on a scratch copy of the configured database.
+#
+#   python -m app.data.import_checks
+
+MARKER = "Zymurgic"
+
+ROWS = [
+    {"title": f"{MARKER} Complete", "director": "A. Director", "year": "1999", "genres": "Drama|Noir"},
+    {"title": f"{MARKER} Blank", "director": "", "year": "", "genres": ""},
+    {"title": f"{MARKER} Missing", "director": None, "year": None, "genres": ["Drama"]},
+]
+
+ENDPOINTS = {
+    "movie list search": f"/movies/?search={MARKER}&limit=10",
+    "full-text search": f"/movies/search/?query={MARKER}",
+}
+
+
+async def check_import_round_trip(app) -> dict:
+    # Returns {check name: problem} for every endpoint that failed
+    from app.data.catalog_import import import_catalog
+    from app.database import engine
+
+    stats = import_catalog(engine, ROWS, batch_size=2)
+    if stats.movies != len(ROWS):
+        return {"import": f"imported {stats.movies} of {len(ROWS)} rows"}
+
+    expected = {row["title"]: (row["director"] or None, int(row["year"]) if row["year"] else None) for row in ROWS}
+    failures = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url="http://test") as client:
+        for name, path in ENDPOINTS.items():
+            response = await client.get(path)
+            if response.status_code != 200:
+                failures[name] = f"{path} returned {response.status_code}"
+                continue
+            body = response.json()
+            items = body["items"] if isinstance(body, dict) else body
+            found = {item["title"]: (item["director"], item["year"]) for item in items}
+            if found != expected:
+                failures[name] = f"expected {expected}, got {found}"
+    return failures
+
+
+if __name__ == "__main__":
+    from app.scratch_db import scratch_database
+
+    with scratch_database():
+        from app.main import app
+
+        failures = asyncio.run(check_import_round_trip(app))
+    for name in ("import",) if "import" in failures else ENDPOINTS:
+        print(f"{'FAIL' if name in failures else 'ok':<5} {name}")
+        if name in failures:
+            print(f"      {failures[name]}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,207 @@
+import argparse
+import csv
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection, Engine
+from app.data.catalog_import import insert_sql
+from app.database.aggregates import rebuild_rating_aggregates
+from app.database.sqlite import begin_immediate
+from app.models.models import Movie, User
+from app.security.security import get_password_hash
+
+# Bulk import of MovieLens-style ratings files (userId,movieId,rating,timestamp).
+#
+#   python -m app.data.ratings_import ratings.csv
+#
+# The file is streamed in chunks of 50k rows, one transaction each. Users
+# that don't exist yet are created per chunk as "<prefix><external id>",
+# with an email under IMPORT_EMAIL_DOMAIN (an example.com subdomain, so it
+# passes email validation) and a password hash nobody knows, so they
+# can't log in. They are found again by
+# users.import_key, which registration never sets; a registered user
+# whose username or email is already taken keeps it, and the imported
+# user gets its id appended. Movie ids in the file are catalog
+# ids (import the catalog with its ids first); ratings for unknown movies
+# are skipped. Half-star ratings are rounded half up to the 1-5 scale.
+#
+# record_rating() is bypassed on purpose: the per-movie aggregates are
+# rebuilt once, in a single GROUP BY pass, after the last chunk. Importing
+# the same file twice imports its ratings twice.
+
+DEFAULT_CHUNK_SIZE = 50_000
+DEFAULT_USER_PREFIX = "ml_"
+
+REVIEW_INSERT = insert_sql("reviews", ("rating", "comment", "created_at", "user_id", "movie_id"))
+USER_INSERT = insert_sql("users", ("id", "email", "username", "hashed_password", "created_at", "import_key"))
+IMPORT_EMAIL_DOMAIN = "ratings-import.example.com"
+
+# How SQLAlchemy's DateTime stores values in SQLite
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+@dataclass
+class RatingsImportStats:
+    reviews: int = 0
+    users_created: int = 0
+    skipped: int = 0
+    movies_rebuilt: int = 0
+    import_seconds: float = 0.0
+    rebuild_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.reviews / self.import_seconds if self.import_seconds else 0.0
+
+
+def read_ratings(path: Path):
+    # Accepts the MovieLens header (userId,movieId,...) or none at all
+    with path.open(newline="", encoding="utf-8") as source:
+        for row in csv.reader(source):
+            if not row or not row[0].strip().lstrip("-").isdigit():
+                continue
+            yield row
+
+
+def _to_rating(value: str) -> int:
+    return min(5, max(1, int(float(value) + 0.5)))
+
+
+def _to_datetime(value) -> str:
+    if value in (None, ""):
+        moment = datetime.utcnow()
+    else:
+        moment = datetime.utcfromtimestamp(int(value))
+    return moment.strftime(SQLITE_DATETIME_FORMAT)
+
+
+class RatingsImporter:
+    def __init__(self, conn: Connection, user_prefix: str = DEFAULT_USER_PREFIX):
+        self.conn = conn
+        self.user_prefix = user_prefix
+        self.movie_ids = set(conn.execute(select(Movie.id)).scalars())
+        # external user id -> users.id, for users created by earlier runs
+        self.user_ids = {
+            import_key[len(user_prefix):]: user_id
+            for user_id, import_key in conn.execute(
+                select(User.id, User.import_key).where(User.import_key.startswith(user_prefix, autoescape=True))
+            )
+        }
+        # Names that registered users already hold
+        self.taken = set()
+        for username, email in conn.execute(
+            select(User.username, User.email).where(
+                User.import_key.is_(None),
+                User.username.startswith(user_prefix, autoescape=True)
+                | User.email.endswith(f"@{IMPORT_EMAIL_DOMAIN}", autoescape=True)
+            )
+        ):
+            self.taken.update((username, email))
+        self.password_hash = get_password_hash(secrets.token_urlsafe(32))
+        self.next_user_id = 1
+
+    def import_chunk(self, rows, stats: RatingsImportStats):
+        # Ids are read in the chunk's transaction, like the catalog import
+        begin_immediate(self.conn)
+        self.next_user_id = max(self.next_user_id, (self.conn.execute(select(func.max(User.id))).scalar() or 0) + 1)
+        now = datetime.utcnow().strftime(SQLITE_DATETIME_FORMAT)
+        new_users, reviews = [], []
+        for row in rows:
+            try:
+                external_user, movie_id, rating = row[0].strip(), int(row[1]), _to_rating(row[2])
+                created_at = _to_datetime(row[3] if len(row) > 3 else None)
+            except (IndexError, ValueError):
+                stats.skipped += 1
+                continue
+            if movie_id not in self.movie_ids:
+                stats.skipped += 1
+                continue
+
+            user_id = self.user_ids.get(external_user)
+            if user_id is None:
+                user_id = self.user_ids[external_user] = self.next_user_id
+                self.next_user_id += 1
+                import_key = username = f"{self.user_prefix}{external_user}"
+                if username in self.taken or f"{username}@{IMPORT_EMAIL_DOMAIN}" in self.taken:
+                    username = f"{username}_{user_id}"
+                new_users.append({
+                    "id": user_id,
+                    "email": f"{username}@{IMPORT_EMAIL_DOMAIN}",
+                    "username": username,
+                    "hashed_password": self.password_hash,
+                    "created_at": now,
+                    "import_key": import_key,
+                })
+            reviews.append({
+                "rating": rating,
+                "comment": None,
+                "created_at": created_at,
+                "user_id": user_id,
+                "movie_id": movie_id,
+            })
+
+        if new_users:
+            self.conn.exec_driver_sql(USER_INSERT, new_users)
+        if reviews:
+            self.conn.exec_driver_sql(REVIEW_INSERT, reviews)
+        stats.users_created += len(new_users)
+        stats.reviews += len(reviews)
+
+
+def import_ratings(engine: Engine, rows, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   user_prefix: str = DEFAULT_USER_PREFIX, progress=None) -> RatingsImportStats:
+    stats = RatingsImportStats()
+    started = time.perf_counter()
+    rows = iter(rows)
+    with engine.connect() as conn:
+        importer = RatingsImporter(conn, user_prefix)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            importer.import_chunk(chunk, stats)
+            conn.commit()
+            stats.import_seconds = time.perf_counter() - started
+            if progress:
+                progress(stats)
+
+        rebuild_started = time.perf_counter()
+        stats.movies_rebuilt = rebuild_rating_aggregates(conn)
+        conn.commit()
+        stats.rebuild_seconds = time.perf_counter() - rebuild_started
+    return stats
+
+
+def main():
+    from app.database import engine
+
+    parser = argparse.ArgumentParser(description="Import a MovieLens-style ratings file")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--user-prefix", default=DEFAULT_USER_PREFIX)
+    args = parser.parse_args()
+
+    def progress(stats: RatingsImportStats):
+        print(f"\r{stats.reviews} ratings, {stats.rows_per_second:.0f} rows/s", end="", flush=True)
+
+    stats = import_ratings(
+        engine,
+        read_ratings(args.path),
+        chunk_size=args.chunk_size,
+        user_prefix=args.user_prefix,
+        progress=progress
+    )
+    print(
+        f"\rImported {stats.reviews} ratings ({stats.skipped} skipped) and created "
+        f"{stats.users_created} users in {stats.import_seconds:.1f}s "
+        f"({stats.rows_per_second:.0f} rows/s); rebuilt aggregates for "
+        f"{stats.movies_rebuilt} movies in {stats.rebuild_seconds:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import argparse
+import secrets
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Engine
+from app.data.catalog_import import import_catalog, insert_sql
+from app.database.aggregates import rebuild_rating_aggregates
+from app.database.recommendations import STALE_TRIGGER_DDL, create_recommendation_triggers
+from app.database.sqlite import begin_immediate
+from app.database.versions import create_version_triggers
+from app.models.models import Movie, Review, User
+from app.security.security import get_password_hash
+
+# Deterministic synthetic dataset for scale testing.
+#
+#   DATABASE_URL=sqlite:///synthetic.db python -m app.data.synthetic \
+#       --users 100000 --movies 50000 --reviews 10000000
+#
+# The same seed and --end produce the same rows. Movies get one to three
+# genres, drawn from skewed genre weights, and years that thin out
+# towards the past and stop at the year of --end. Reviews pick their movie from a Zipf distribution over
+# a random popularity order, so a few movies get most of the reviews, and
+# their user from a flatter one, so a few users write a lot. Ratings lean
+# positive like real ones (mean around 3.5), shifted per movie (quality)
+# and per user (harshness). Review times fall in the --days before --end,
+# denser towards the end.
+#
+# Movies go through the catalog importer (so the search index is filled).
+# Users and reviews are written straight from numpy arrays with driver
+# executemany, with the per-row review triggers and the review indexes
+# dropped for the load (both are restored even if it fails). The
+# rating aggregates are rebuilt once at the end, like after a ratings
+# import. Generated users can't log in unless --password is given.
+
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 200_000
+DEFAULT_USER_PREFIX = "synth_"
+# example.com subdomains pass email validation, unlike .invalid ones
+EMAIL_DOMAIN = "synthetic.example.com"
+
+GENRES = {
+    "Drama": 24, "Comedy": 18, "Action": 12, "Thriller": 10, "Romance": 8,
+    "Horror": 7, "Crime": 7, "Adventure": 6, "Sci-Fi": 5, "Documentary": 5,
+    "Animation": 4, "Fantasy": 4, "Mystery": 4, "Family": 3, "War": 2,
+    "Musical": 2, "Western": 1, "Film-Noir": 1,
+}
+# Share of movies per decade; later decades have more
+DECADES = {
+    1920: 1, 1930: 2, 1940: 3, 1950: 4, 1960: 5, 1970: 6,
+    1980: 9, 1990: 13, 2000: 18, 2010: 22, 2020: 17,
+}
+ADJECTIVES = (
+    "Silent", "Broken", "Last", "Hidden", "Golden", "Dark", "Lost", "Burning", "Crimson", "Endless",
+    "Forgotten", "Wild", "Frozen", "Electric", "Midnight", "Distant", "Secret", "Hollow", "Bright", "Savage",
+)
+NOUNS = (
+    "River", "Empire", "Garden", "Horizon", "Signal", "Kingdom", "Shadow", "Harbor", "Machine", "Summer",
+    "Witness", "Frontier", "Storm", "Letter", "Mountain", "Orbit", "Promise", "Station", "Voyage", "Winter",
+)
+FIRST_NAMES = ("Ana", "Ben", "Chloe", "David", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jonas", "Kemi", "Luca")
+LAST_NAMES = ("Almeida", "Brooks", "Chen", "Dubois", "Eriksen", "Fischer", "Garcia", "Haddad", "Ito", "Kowalski")
+SYNOPSES = (
+    "A {noun} keeps a secret that could change everything.",
+    "Two strangers cross paths near the {noun} and nothing is the same again.",
+    "An unlikely crew sets out to find the {noun} before it is too late.",
+    "A family returns to the {noun} for one last summer.",
+)
+
+REVIEW_INSERT = "INSERT INTO reviews (rating, created_at, user_id, movie_id) VALUES (?, ?, ?, ?)"
+USER_INSERT = insert_sql("users", ("id", "email", "username", "hashed_password", "created_at"))
+
+
+@dataclass
+class SyntheticStats:
+    users: int = 0
+    movies: int = 0
+    reviews: int = 0
+    movie_seconds: float = 0.0
+    user_seconds: float = 0.0
+    review_seconds: float = 0.0
+    rebuild_seconds: float = 0.0
+
+    @property
+    def reviews_per_second(self) -> float:
+        return self.reviews / self.review_seconds if self.review_seconds else 0.0
+
+
+def _weights(values) -> np.ndarray:
+    weights = np.asarray(values, dtype=np.float64)
+    return weights / weights.sum()
+
+
+def zipf_weights(count: int, exponent: float) -> np.ndarray:
+    return _weights(1.0 / np.arange(1, count + 1) ** exponent)
+
+
+def generate_movies(rng: np.random.Generator, first_id: int, count: int, last_year: int):
+    genre_names = list(GENRES)
+    genre_p = _weights(list(GENRES.values()))
+    # No release years after last_year: later decades are dropped and the
+    # current one is cut short
+    decades = [decade for decade in DECADES if decade <= last_year]
+    decades = rng.choice(decades, size=count, p=_weights([DECADES[decade] for decade in decades]))
+    years = decades + rng.integers(0, np.minimum(10, last_year - decades + 1))
+    genre_counts = rng.choice([1, 2, 3], size=count, p=[0.45, 0.4, 0.15])
+    for offset in range(count):
+        adjective = ADJECTIVES[rng.integers(len(ADJECTIVES))]
+        noun = NOUNS[rng.integers(len(NOUNS))]
+        genres = rng.choice(len(genre_names), size=genre_counts[offset], replace=False, p=genre_p)
+        yield {
+            "id": first_id + offset,
+            # Numbered so titles repeat the way remakes and sequels do
+            "title": f"The {adjective} {noun}" + (f" {offset // 400 + 1}" if offset >= 400 else ""),
+            "director": f"{FIRST_NAMES[rng.integers(len(FIRST_NAMES))]} {LAST_NAMES[rng.integers(len(LAST_NAMES))]}",
+            "year": int(years[offset]),
+            "synopsis": SYNOPSES[rng.integers(len(SYNOPSES))].format(noun=noun.lower()),
+            "genres": [genre_names[index] for index in genres],
+        }
+
+
+def _timestamps(moments: np.ndarray) -> list:
+    # Unix seconds -> SQLAlchemy's SQLite DateTime text, vectorised
+    strings = np.datetime_as_string((moments * 1e6).astype("datetime64[us]"), unit="us")
+    return np.char.replace(strings, "T", " ").tolist()
+
+
+def generate(engine: Engine, users: int, movies: int, reviews: int, seed: int = DEFAULT_SEED,
+             end: datetime = None, days: float = 365, zipf: float = 1.07, password: str = None,
+             chunk_size: int = DEFAULT_CHUNK_SIZE, progress=None) -> SyntheticStats:
+    rng = np.random.default_rng(seed)
+    end = end or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    end_ts, span = end.timestamp(), days * 86400
+    stats = SyntheticStats()
+
+    with engine.connect() as conn:
+        first_movie = (conn.execute(select(func.max(Movie.id))).scalar() or 0) + 1
+        first_user = (conn.execute(select(func.max(User.id))).scalar() or 0) + 1
+
+    started = time.perf_counter()
+    stats.movies = import_catalog(engine, generate_movies(rng, first_movie, movies, end.year)).movies
+    stats.movie_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    hashed_password = get_password_hash(password or secrets.token_urlsafe(32))
+    created = _timestamps(np.full(users, end_ts - span))
+    with engine.begin() as conn:
+        for start in range(0, users, chunk_size):
+            conn.exec_driver_sql(USER_INSERT, [
+                {
+                    "id": first_user + index,
+                    "email": f"{DEFAULT_USER_PREFIX}{first_user + index}@{EMAIL_DOMAIN}",
+                    "username": f"{DEFAULT_USER_PREFIX}{first_user + index}",
+                    "hashed_password": hashed_password,
+                    "created_at": created[index],
+                }
+                for index in range(start, min(start + chunk_size, users))
+            ])
+    stats.users = users
+    stats.user_seconds = time.perf_counter() - started
+
+    # Popularity order is a shuffle, so it doesn't follow the ids
+    movie_ids = first_movie + rng.permutation(movies)
+    movie_p = zipf_weights(movies, zipf)
+    # Quality is independent of popularity, but popular movies are a bit better
+    quality = rng.normal(0.0, 0.6, movies) + 0.4 * (1 - np.arange(movies) / movies)
+    user_ids = first_user + rng.permutation(users)
+    user_p = zipf_weights(users, 0.6)
+    harshness = rng.normal(0.0, 0.4, users)
+
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        # Building the secondary indexes once, from sorted data, is much
+        # cheaper than updating them row by row in random order
+        for index in Review.__table__.indexes:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+        conn.commit()
+        try:
+            for start in range(0, reviews, chunk_size):
+                size = min(chunk_size, reviews - start)
+                movie_rank = rng.choice(movies, size=size, p=movie_p)
+                user_rank = rng.choice(users, size=size, p=user_p)
+                score = 3.35 + quality[movie_rank] + harshness[user_rank] + rng.normal(0.0, 0.9, size)
+                ratings = np.clip(np.rint(score), 1, 5).astype(np.int64)
+                moments = end_ts - span * rng.random(size) ** 2
+                rows = zip(ratings.tolist(), _timestamps(moments), user_ids[user_rank].tolist(), movie_ids[movie_rank].tolist())
+                # Per-row triggers are dropped inside the chunk's transaction,
+                # begun explicitly (pysqlite would run the DROPs in autocommit),
+                # so other connections never see the table without them
+                begin_immediate(conn)
+                conn.exec_driver_sql("DROP TRIGGER IF EXISTS reviews_version_insert")
+                conn.exec_driver_sql("DROP TRIGGER IF EXISTS reviews_recommendations_stale")
+                conn.exec_driver_sql(REVIEW_INSERT, list(rows))
+                conn.execute(text("UPDATE table_versions SET version = version + 1 WHERE name = 'reviews'"))
+                create_version_triggers(conn)
+                conn.execute(text(STALE_TRIGGER_DDL))
+                conn.commit()
+                stats.reviews += size
+                stats.review_seconds = time.perf_counter() - started
+                if progress:
+                    progress(stats)
+        finally:
+            conn.rollback()
+            for index in Review.__table__.indexes:
+                index.create(conn, checkfirst=True)
+            create_version_triggers(conn)
+            conn.execute(text(STALE_TRIGGER_DDL))
+            conn.commit()
+            stats.review_seconds = time.perf_counter() - started
+
+        rebuild_started = time.perf_counter()
+        # Every generated reviewer needs a first recommendation list
+        create_recommendation_triggers(conn)
+        rebuild_rating_aggregates(conn)
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+        stats.rebuild_seconds = time.perf_counter() - rebuild_started
+    return stats
+
+
+def main():
+    from app.database import engine
+    from app.database.init_db import init_db
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic users/movies/reviews dataset")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--movies", type=int, default=5_000)
+    parser.add_argument("--reviews", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--end", type=datetime.fromisoformat, help="latest review time (default: today 00:00 UTC)")
+    parser.add_argument("--days", type=float, default=365, help="how far back reviews go")
+    parser.add_argument("--zipf", type=float, default=1.07, help="movie popularity exponent")
+    parser.add_argument("--password", help="give every generated user this password")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    init_db()
+
+    def progress(stats: SyntheticStats):
+        print(f"\r{stats.reviews} reviews, {stats.reviews_per_second:.0f} rows/s", end="", flush=True)
+
+    stats = generate(
+        engine, args.users, args.movies, args.reviews, seed=args.seed, end=args.end, days=args.days,
+        zipf=args.zipf, password=args.password, chunk_size=args.chunk_size, progress=progress
+    )
+    print(
+        f"\rGenerated {stats.movies} movies in {stats.movie_seconds:.1f}s, {stats.users} users in "
+        f"{stats.user_seconds:.1f}s and {stats.reviews} reviews in {stats.review_seconds:.1f}s "
+        f"({stats.reviews_per_second:.0f} rows/s); aggregates rebuilt in {stats.rebuild_seconds:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,24 @@
-from sqlalchemy import create_engine
+import os
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from app.database.registry import EngineRegistry
+from app.database.sqlite import SQLiteProfile
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///movies.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///movies.db")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# WAL, pragmas and pool sizing, overridable through SQLITE_* / DB_POOL_* env vars
+sqlite_profile = SQLiteProfile.from_env()
+
+# Every engine and session in the app comes from here
+registry = EngineRegistry(SQLALCHEMY_DATABASE_URL, sqlite_profile)
+
+engine = registry.engine
+SessionLocal = registry.session_factory
+async_engine = registry.async_engine
+AsyncSessionLocal = registry.async_session_factory
 
 Base = declarative_base()
 
 # Add the get_db function
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,143 @@
+import os
+from sqlalchemy import Float, cast, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Movie, Review, rating_prior
+
+# Movie.rating_sum / review_count / rating_average / weighted_score are
+# maintained here and nowhere else. Every review write goes through
+# record_rating so the aggregates stay correct without re-reading the
+# movie's reviews.
+#
+# weighted_score is the Bayesian (IMDb-style) rating
+#     (rating_sum + m * C) / (review_count + m)
+# where C is the mean of all ratings and m the number of votes of it each
+# movie starts with, so a single 5-star review can't outrank a classic.
+# C and m live in rating_prior and only move when the aggregates are
+# rebuilt or refresh_rating_prior finds they have drifted; in between each
+# write updates one movie's score.
+
+# Prior votes; by default the median review count of reviewed movies
+RATING_PRIOR_VOTES = os.getenv("RATING_PRIOR_VOTES")
+# Relative change of C or m that makes refresh_rating_prior rescore
+RATING_PRIOR_DRIFT = float(os.getenv("RATING_PRIOR_DRIFT", "0.02"))
+
+_prior_mean = select(func.coalesce(func.max(rating_prior.c.mean), 0.0)).scalar_subquery()
+_prior_votes = select(func.coalesce(func.max(rating_prior.c.votes), 0.0)).scalar_subquery()
+
+
+async def record_rating(db: AsyncSession, movie_id: int, rating: int):
+    # Single UPDATE inside the caller's transaction. SQLite evaluates the
+    # right-hand side against the old row, so the average uses the new sum
+    # and count without a read-modify-write in Python.
+    return await db.execute(
+        update(Movie)
+        .where(Movie.id == movie_id)
+        .values(
+            rating_sum=Movie.rating_sum + rating,
+            review_count=Movie.review_count + 1,
+            rating_average=(Movie.rating_sum + rating) / (Movie.review_count + 1),
+            weighted_score=(Movie.rating_sum + rating + _prior_votes * _prior_mean)
+            / (Movie.review_count + 1 + _prior_votes)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def unreviewed_score(db) -> float:
+    # weighted_score of a movie without reviews: the prior mean
+    return db.execute(select(_prior_mean)).scalar()
+
+
+def _compute_prior(db, mean=None) -> tuple:
+    if mean is None:
+        mean = db.execute(select(cast(func.avg(Review.rating), Float))).scalar() or 0.0
+    if RATING_PRIOR_VOTES is not None:
+        votes = float(RATING_PRIOR_VOTES)
+    else:
+        reviewed = db.execute(select(func.count()).where(Movie.review_count > 0)).scalar()
+        votes = db.execute(
+            select(Movie.review_count)
+            .where(Movie.review_count > 0)
+            .order_by(Movie.review_count)
+            .offset(reviewed // 2)
+            .limit(1)
+        ).scalar() or 1
+    return mean, float(votes)
+
+
+def _store_prior(db, mean: float, votes: float):
+    db.execute(delete(rating_prior))
+    db.execute(insert(rating_prior).values(id=1, mean=mean, votes=votes))
+    # Every score depends on the prior
+    db.execute(
+        update(Movie)
+        .values(weighted_score=(Movie.rating_sum + votes * mean) / (Movie.review_count + votes))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def rebuild_rating_totals(db):
+    # One GROUP BY pass over reviews, joined back onto movies with
+    # UPDATE ... FROM. Movies without reviews are reset first.
+    totals = (
+        select(
+            Review.movie_id,
+            cast(func.sum(Review.rating), Float).label("rating_sum"),
+            func.count(Review.id).label("review_count")
+        )
+        .group_by(Review.movie_id)
+        .subquery()
+    )
+    db.execute(
+        update(Movie)
+        .values(rating_sum=0.0, review_count=0, rating_average=0.0)
+        .execution_options(synchronize_session=False)
+    )
+    result = db.execute(
+        update(Movie)
+        .where(Movie.id == totals.c.movie_id)
+        .values(
+            rating_sum=totals.c.rating_sum,
+            review_count=totals.c.review_count,
+            rating_average=totals.c.rating_sum / totals.c.review_count
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def rebuild_rating_aggregates(db):
+    updated = rebuild_rating_totals(db)
+    # The prior depends on the totals, then every score on the prior
+    _store_prior(db, *_compute_prior(db))
+    return updated
+
+
+def refresh_rating_prior(db, drift: float = RATING_PRIOR_DRIFT) -> bool:
+    # Recomputes C and m from the maintained totals, without reading the
+    # reviews, and rescores every movie if either moved by more than drift
+    # (relative), there is no prior yet or some movie has no score. Returns
+    # whether it rescored. Call it inside a write transaction, so that
+    # concurrent callers serialise.
+    totals = db.execute(select(func.sum(Movie.rating_sum), func.sum(Movie.review_count))).first()
+    mean = totals[0] / totals[1] if totals[1] else 0.0
+    mean, votes = _compute_prior(db, mean)
+    current = db.execute(select(rating_prior.c.mean, rating_prior.c.votes)).first()
+    unscored = db.execute(select(Movie.id).where(Movie.weighted_score.is_(None)).limit(1)).first()
+    if current is not None and unscored is None and all(
+        abs(new - old) <= drift * abs(old) for new, old in zip((mean, votes), current)
+    ):
+        return False
+    _store_prior(db, mean, votes)
+    return True
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        updated = rebuild_rating_aggregates(db)
+        db.commit()
+        print(f"Rebuilt rating aggregates for {updated} movies")
+    finally:
+        db.close()
@@ -0,0 +1,111 @@
+import re
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.sqlite import begin_immediate
+
+# External-content FTS5 index over the searchable movie columns.
+# The triggers keep it in sync with the movies table, so the index never
+# has to be rebuilt by application code.
+FTS_TABLE = "movies_fts"
+
+FTS_INSERT_TRIGGER_DDL = f"""
+    CREATE TRIGGER IF NOT EXISTS movies_fts_ai AFTER INSERT ON movies BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, director, synopsis)
+        VALUES (new.id, new.title, new.director, new.synopsis);
+    END
+"""
+
+FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, director, synopsis,
+        content='movies', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    FTS_INSERT_TRIGGER_DDL,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS movies_fts_ad AFTER DELETE ON movies BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, director, synopsis)
+        VALUES ('delete', old.id, old.title, old.director, old.synopsis);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS movies_fts_au AFTER UPDATE OF title, director, synopsis ON movies BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, director, synopsis)
+        VALUES ('delete', old.id, old.title, old.director, old.synopsis);
+        INSERT INTO {FTS_TABLE}(rowid, title, director, synopsis)
+        VALUES (new.id, new.title, new.director, new.synopsis);
+    END
+    """,
+]
+
+# bm25() column weights: a title hit matters more than a director hit,
+# which matters more than a word somewhere in the synopsis.
+BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def create_fts_index(engine: Engine):
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE}
+        ).first()
+        for statement in FTS_DDL:
+            conn.execute(text(statement))
+        # Index rows that were already in the movies table before the
+        # triggers existed
+        if not exists:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def bulk_insert_movies(conn: Connection, insert_sql: str, movies: list):
+    # For bulk loads the per-row insert trigger is several times slower
+    # than one executemany into the index. The trigger is dropped and
+    # recreated inside the caller's transaction (begun here if it isn't
+    # yet), so other connections never see the movies table without it,
+    # and recreated even if the insert fails. `movies` are dicts with at
+    # least id, title, director and synopsis, bound by name into insert_sql.
+    begin_immediate(conn)
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS movies_fts_ai")
+    try:
+        conn.exec_driver_sql(insert_sql, movies)
+        conn.exec_driver_sql(
+            f"INSERT INTO {FTS_TABLE}(rowid, title, director, synopsis) "
+            "VALUES (:id, :title, :director, :synopsis)",
+            movies
+        )
+    finally:
+        conn.exec_driver_sql(FTS_INSERT_TRIGGER_DDL)
+
+
+def build_match_query(query: str) -> str:
+    # Quote every token so user input can't inject FTS5 operators, and make
+    # each one a prefix match so results appear while the user is typing
+    tokens = _TOKEN_RE.findall(query)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+async def search_movie_ids(db: AsyncSession, query: str, limit: int) -> list:
+    match = build_match_query(query)
+    if not match:
+        return []
+    rows = await db.execute(
+        text(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+            f"ORDER BY bm25({FTS_TABLE}, :w_title, :w_director, :w_synopsis) "
+            "LIMIT :limit"
+        ),
+        {
+            "match": match,
+            "w_title": BM25_WEIGHTS[0],
+            "w_director": BM25_WEIGHTS[1],
+            "w_synopsis": BM25_WEIGHTS[2],
+            "limit": limit
+        }
+    )
+    return [row[0] for row in rows]
@@ -1,9 +1,13 @@
 from sqlalchemy.orm import Session
 from app.models import models
-from app.database.database import engine, Base
+from app.database import engine, Base
+from app.database.fts import create_fts_index
+from app.database.migrations import run_migrations
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    create_fts_index(engine)
     
 def seed_data(db: Session):
     # Check if we already have movies
@@ -126,7 +130,7 @@ def seed_data(db: Session):
     db.commit()
 
 if __name__ == "__main__":
-    from app.database.database import SessionLocal
+    from app.database import SessionLocal
     db = SessionLocal()
     init_db()
     seed_data(db)
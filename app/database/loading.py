@@ -0,0 +1,23 @@
+from collections import defaultdict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Genre, movie_genre
+
+# Batch loaders for data shown alongside a page of movies. Each one costs a
+# single query for the whole page instead of a lazy load per movie.
+
+
+async def load_genre_names(db: AsyncSession, movie_ids) -> dict:
+    movie_ids = list(set(movie_ids))
+    genre_names = defaultdict(list)
+    if not movie_ids:
+        return genre_names
+    rows = await db.execute(
+        select(movie_genre.c.movie_id, Genre.name)
+        .join(Genre, Genre.id == movie_genre.c.genre_id)
+        .where(movie_genre.c.movie_id.in_(movie_ids))
+        .order_by(movie_genre.c.movie_id, Genre.name)
+    )
+    for movie_id, name in rows:
+        genre_names[movie_id].append(name)
+    return genre_names
@@ -0,0 +1,165 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+# Schema changes to tables that create_all() won't alter once they exist.
+# The applied version is stored in SQLite's PRAGMA user_version; every
+# migration must also be safe to run against a freshly created schema.
+
+
+def _column_names(conn: Connection, table: str) -> set:
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def _add_movie_rating_sum(conn: Connection):
+    from app.database.aggregates import rebuild_rating_totals
+
+    # weighted_score doesn't exist yet on old databases; version 6 adds it
+    if "rating_sum" not in _column_names(conn, "movies"):
+        conn.execute(text("ALTER TABLE movies ADD COLUMN rating_sum FLOAT DEFAULT 0.0"))
+    rebuild_rating_totals(conn)
+
+
+def _add_movie_sort_indexes(conn: Connection):
+    from app.models.models import Movie
+
+    # Indexes on columns added by later versions are created by those
+    columns = _column_names(conn, "movies")
+    for index in Movie.__table__.indexes:
+        if all(column.name in columns for column in index.columns):
+            index.create(conn, checkfirst=True)
+
+
+def _add_table_versions(conn: Connection):
+    from app.database.versions import create_version_triggers
+
+    create_version_triggers(conn)
+
+
+def _add_hot_path_indexes(conn: Connection):
+    from app.database.versions import create_version_triggers
+    from app.models.models import Review, Watchlist, movie_genre
+
+    # movie_genre had no key at all; rebuild it around (genre_id, movie_id),
+    # dropping duplicate and half-empty pairs on the way
+    primary_key = inspect(conn).get_pk_constraint("movie_genre")["constrained_columns"]
+    if primary_key != ["genre_id", "movie_id"]:
+        conn.execute(text("ALTER TABLE movie_genre RENAME TO movie_genre_old"))
+        movie_genre.create(conn)
+        conn.execute(text(
+            "INSERT OR IGNORE INTO movie_genre (movie_id, genre_id) "
+            "SELECT movie_id, genre_id FROM movie_genre_old "
+            "WHERE movie_id IS NOT NULL AND genre_id IS NOT NULL"
+        ))
+        # The version triggers moved with the renamed table
+        conn.execute(text("DROP TABLE movie_genre_old"))
+        create_version_triggers(conn)
+
+    # The unique index can't be built over duplicate watchlist entries
+    conn.execute(text(
+        "DELETE FROM watchlists WHERE id NOT IN ("
+        "SELECT MIN(id) FROM watchlists GROUP BY user_id, movie_id)"
+    ))
+    for table in (Review.__table__, Watchlist.__table__, movie_genre):
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    conn.execute(text("ANALYZE"))
+
+
+def _add_user_recommendations(conn: Connection):
+    from app.database.recommendations import create_recommendation_triggers
+    from app.models.models import UserRecommendation, UserRecommendationState
+
+    UserRecommendation.__table__.create(conn, checkfirst=True)
+    UserRecommendationState.__table__.create(conn, checkfirst=True)
+    create_recommendation_triggers(conn)
+
+
+def _add_movie_weighted_score(conn: Connection):
+    from app.database.aggregates import rebuild_rating_aggregates
+    from app.models.models import Movie, rating_prior
+
+    if "weighted_score" not in _column_names(conn, "movies"):
+        conn.execute(text("ALTER TABLE movies ADD COLUMN weighted_score FLOAT"))
+    rating_prior.create(conn, checkfirst=True)
+    for index in Movie.__table__.indexes:
+        index.create(conn, checkfirst=True)
+    rebuild_rating_aggregates(conn)
+    # Without stats for the new index the planner sorts instead of using it
+    conn.execute(text("ANALYZE movies"))
+
+
+def _add_review_likes(conn: Connection):
+    if "likes" not in _column_names(conn, "reviews"):
+        conn.execute(text("ALTER TABLE reviews ADD COLUMN likes INTEGER NOT NULL DEFAULT 0"))
+
+
+
+def _add_user_import_key(conn: Connection):
+    from app.models.models import User
+
+    if "import_key" not in _column_names(conn, "users"):
+        conn.execute(text("ALTER TABLE users ADD COLUMN import_key VARCHAR"))
+        # Users created by earlier ratings imports, recognised by the
+        # email they were given
+        conn.execute(text(
+            "UPDATE users SET import_key = username "
+            "WHERE email = username || '@ratings-import.invalid'"
+        ))
+    for index in User.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def _split_movie_rating_version(conn: Connection):
+    from app.database.versions import create_version_triggers
+
+    # Rating aggregate updates no longer bump the movies version
+    conn.execute(text("DROP TRIGGER IF EXISTS movies_version_update"))
+    create_version_triggers(conn)
+
+
+def _move_generated_user_emails(conn: Connection):
+    # Imported and synthetic users had .invalid emails, which fail email
+    # validation when their profile is served
+    for old, new in (("ratings-import.invalid", "ratings-import.example.com"),
+                     ("synthetic.invalid", "synthetic.example.com")):
+        conn.execute(
+            text("UPDATE users SET email = substr(email, 1, length(email) - :length) || :new WHERE email LIKE :pattern"),
+            {"length": len(old), "new": new, "pattern": f"%@{old}"}
+        )
+
+
+def _add_review_page_index(conn: Connection):
+    from app.models.models import Review
+
+    for index in Review.__table__.indexes:
+        index.create(conn, checkfirst=True)
+    conn.execute(text("ANALYZE reviews"))
+
+
+MIGRATIONS = [
+    (1, _add_movie_rating_sum),
+    (2, _add_movie_sort_indexes),
+    (3, _add_table_versions),
+    (4, _add_hot_path_indexes),
+    (5, _add_user_recommendations),
+    (6, _add_movie_weighted_score),
+    (7, _add_review_likes),
+    (8, _add_user_import_key),
+    (9, _split_movie_rating_version),
+    (10, _move_generated_user_emails),
+    (11, _add_review_page_index),
+]
+
+
+def get_schema_version(conn: Connection) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def run_migrations(engine: Engine):
+    with engine.begin() as conn:
+        current = get_schema_version(conn)
+        for version, migration in MIGRATIONS:
+            if version <= current:
+                continue
+            migration(conn)
+            conn.execute(text(f"PRAGMA user_version = {version}"))
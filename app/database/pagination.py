@@ -0,0 +1,86 @@
+import base64
+import binascii
+import json
+from sqlalchemy import Select, and_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Movie
+
+# Keyset pagination for movie listings. Each sort option is a column plus
+# the primary key as a tie-breaker, in a fixed direction, and is backed by
+# an index whose trailing column is the id, so every page is an index
+# range scan no matter how deep into the catalog it starts.
+MOVIE_SORTS = {
+    "title": (Movie.title, "asc"),
+    "year": (Movie.year, "desc"),
+    "rating": (Movie.rating_average, "desc"),
+}
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort: str, movie: Movie) -> str:
+    column, _ = MOVIE_SORTS[sort]
+    payload = {"s": sort, "k": [getattr(movie, column.key), movie.id]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(sort: str, cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, movie_id = payload["k"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if payload.get("s") != sort or not isinstance(movie_id, int):
+        raise InvalidCursor("Cursor does not match the requested sort order")
+    return value, movie_id
+
+
+def _remaining_segments(column, direction: str, value, movie_id: int) -> list:
+    # The rows after a cursor, as conditions that each stay an index range.
+    # SQLite sorts NULL below every value, so NULL keys come first ascending
+    # and last descending, and a row-value comparison never matches them:
+    # they are paged as a segment of their own, ordered by id.
+    key = tuple_(column, Movie.id)
+    if direction == "asc":
+        if value is None:
+            return [and_(column.is_(None), Movie.id > movie_id), column.is_not(None)]
+        return [key > tuple_(value, movie_id)]
+    if value is None:
+        return [and_(column.is_(None), Movie.id < movie_id)]
+    return [key < tuple_(value, movie_id), column.is_(None)]
+
+
+async def paginate_movies(db: AsyncSession, query: Select, sort: str, limit: int, cursor: str = None):
+    # Returns (movies, next_cursor). Fetches one extra row to know whether
+    # another page exists without a COUNT(*).
+    column, direction = MOVIE_SORTS[sort]
+
+    if direction == "asc":
+        query = query.order_by(column.asc(), Movie.id.asc())
+    else:
+        query = query.order_by(column.desc(), Movie.id.desc())
+
+    if cursor:
+        value, movie_id = decode_cursor(sort, cursor)
+        segments = _remaining_segments(column, direction, value, movie_id)
+    else:
+        segments = [None]
+
+    # A second query only runs for the page that crosses into the NULLs
+    movies = []
+    for condition in segments:
+        segment = query if condition is None else query.where(condition)
+        movies += (await db.scalars(segment.limit(limit + 1 - len(movies)))).all()
+        if len(movies) > limit:
+            break
+    if len(movies) <= limit:
+        return movies, None
+    movies = movies[:limit]
+    return movies, encode_cursor(sort, movies[-1])
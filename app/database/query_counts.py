@@ -0,0 +1,80 @@
+import asyncio
+import sys
+from contextlib import contextmanager
+import httpx
+from sqlalchemy import event
+
+# Statement-count checks for the movie listings: a page must cost the same
+# number of queries whatever its size, i.e. nothing is loaded per movie.
+# Each endpoint is requested at every page size in PAGE_SIZES through the
+# ASGI app, counting the statements its handler sends to the database.
+#
+#   python -m app.database.query_counts
+
+PAGE_SIZES = (2, 10)
+
+LIST_ENDPOINTS = {
+    "movie list": "/movies/?sort=title&limit={limit}",
+    "movie list by rating": "/movies/?sort=rating&limit={limit}",
+    "movie search": "/movies/search/?query=the&limit={limit}",
+}
+
+
+@contextmanager
+def count_statements(engine):
+    # Yields a list that collects every statement run on the engine
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+
+async def measure(app, engine, path: str) -> tuple:
+    # (statements, items returned) for one request, bypassing the page cache
+    from app.main import movie_list_cache
+
+    movie_list_cache.clear()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        with count_statements(engine) as statements:
+            response = await client.get(path)
+    response.raise_for_status()
+    body = response.json()
+    items = body["items"] if isinstance(body, dict) else body
+    return len(statements), len(items)
+
+
+async def check_query_counts(app, engine) -> dict:
+    # Returns {endpoint name: [problems]} for every listing whose statement
+    # count changes with the page size
+    failures = {}
+    for name, path in LIST_ENDPOINTS.items():
+        results = {limit: await measure(app, engine, path.format(limit=limit)) for limit in PAGE_SIZES}
+        counts = {limit: statements for limit, (statements, _) in results.items()}
+        sizes = {items for _, items in results.values()}
+        problems = []
+        if len(set(counts.values())) > 1:
+            problems.append(f"statements per page size: {counts}")
+        if len(sizes) < len(PAGE_SIZES):
+            # Equal pages prove nothing about per-movie loads
+            problems.append(f"not enough matching movies to tell, got {sorted(sizes)} items")
+        if problems:
+            failures[name] = problems
+    return failures
+
+
+if __name__ == "__main__":
+    from app.database import async_engine
+    from app.main import app
+
+    failures = asyncio.run(check_query_counts(app, async_engine.sync_engine))
+    for name in LIST_ENDPOINTS:
+        print(f"{'FAIL' if name in failures else 'ok':<5} {name}")
+        for problem in failures.get(name, []):
+            print(f"      {problem}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,108 @@
+import sys
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection
+from app.models.models import Genre, Movie, Review, User, UserRecommendation, Watchlist, movie_genre
+
+# EXPLAIN QUERY PLAN checks for the hot read paths in app/main.py. Each
+# entry is the query as the handler issues it, the index its plan must use
+# and plan steps it must not contain (full scans, temp sorts).
+#
+#   python -m app.database.query_plans
+
+HOT_QUERIES = {
+    "movie reviews": (
+        select(Review, User.username).join(User).where(Review.movie_id == 1).order_by(Review.id.desc()).limit(50),
+        ["SEARCH reviews USING INDEX ix_reviews_movie_id_id (movie_id=?)"],
+        ["SCAN reviews", "USE TEMP B-TREE"],
+    ),
+    "movie reviews next page": (
+        select(Review, User.username).join(User)
+        .where(Review.movie_id == 1, Review.id < 1000)
+        .order_by(Review.id.desc()).limit(50),
+        ["SEARCH reviews USING INDEX ix_reviews_movie_id_id (movie_id=? AND id<?)"],
+        ["SCAN reviews", "USE TEMP B-TREE"],
+    ),
+    "movie rating stats": (
+        select(func.avg(Review.rating), func.count(Review.id)).where(Review.movie_id == 1),
+        ["SEARCH reviews USING COVERING INDEX ix_reviews_movie_id_rating (movie_id=?)"],
+        ["SCAN reviews"],
+    ),
+    "user reviews newest first": (
+        select(Review, Movie)
+        .join(Movie, Review.movie_id == Movie.id)
+        .where(Review.user_id == 1)
+        .order_by(Review.created_at.desc()),
+        ["SEARCH reviews USING INDEX ix_reviews_user_id_created_at (user_id=?)"],
+        ["SCAN reviews", "USE TEMP B-TREE"],
+    ),
+    "user review count": (
+        select(func.count(Review.id)).where(Review.user_id == 1),
+        ["SEARCH reviews USING COVERING INDEX ix_reviews_user_id_created_at (user_id=?)"],
+        ["SCAN reviews"],
+    ),
+    "user watchlist": (
+        select(Movie).join(Watchlist, Watchlist.movie_id == Movie.id).where(Watchlist.user_id == 1),
+        ["SEARCH watchlists USING COVERING INDEX ux_watchlists_user_id_movie_id (user_id=?)"],
+        ["SCAN watchlists"],
+    ),
+    "user watchlist count": (
+        select(func.count(Watchlist.id)).where(Watchlist.user_id == 1),
+        ["SEARCH watchlists USING COVERING INDEX ux_watchlists_user_id_movie_id (user_id=?)"],
+        ["SCAN watchlists"],
+    ),
+    "genre names for a page": (
+        select(movie_genre.c.movie_id, Genre.name)
+        .join(Genre, Genre.id == movie_genre.c.genre_id)
+        .where(movie_genre.c.movie_id.in_([1, 2, 3]))
+        .order_by(movie_genre.c.movie_id, Genre.name),
+        ["SEARCH movie_genre USING COVERING INDEX ix_movie_genre_movie_id_genre_id (movie_id=?)"],
+        ["SCAN movie_genre"],
+    ),
+    "movies in a genre": (
+        select(Movie).join(Movie.genres).where(Genre.name == "Drama"),
+        ["USING PRIMARY KEY (genre_id=?)"],
+        ["SCAN movie_genre"],
+    ),
+    "top movies leaderboard": (
+        select(Movie).where(Movie.review_count > 0).order_by(Movie.weighted_score.desc(), Movie.id.desc()).limit(10),
+        ["SCAN movies USING INDEX ix_movies_weighted_score_id"],
+        ["USE TEMP B-TREE"],
+    ),
+    "precomputed recommendations": (
+        select(UserRecommendation.movie_id)
+        .where(UserRecommendation.user_id == 1)
+        .order_by(UserRecommendation.rank)
+        .limit(10),
+        ["SEARCH user_recommendations USING PRIMARY KEY (user_id=?)"],
+        ["SCAN user_recommendations", "USE TEMP B-TREE"],
+    ),
+}
+
+
+def explain(conn: Connection, statement) -> list:
+    sql = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    return [row.detail for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def check_query_plans(conn: Connection) -> dict:
+    # Returns {query name: [problems]} for every plan that misses its index
+    failures = {}
+    for name, (statement, required, forbidden) in HOT_QUERIES.items():
+        plan = explain(conn, statement)
+        problems = [f"missing {step!r}" for step in required if not any(step in detail for detail in plan)]
+        problems += [f"contains {step!r}" for detail in plan for step in forbidden if detail.startswith(step)]
+        if problems:
+            failures[name] = problems + [f"plan: {plan}"]
+    return failures
+
+
+if __name__ == "__main__":
+    from app.database import engine
+
+    with engine.connect() as conn:
+        failures = check_query_plans(conn)
+    for name in HOT_QUERIES:
+        print(f"{'FAIL' if name in failures else 'ok':<5} {name}")
+        for problem in failures.get(name, []):
+            print(f"      {problem}")
+    sys.exit(1 if failures else 0)
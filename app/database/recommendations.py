@@ -0,0 +1,144 @@
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Review, movie_genre
+
+# Storage for the precomputed per-user recommendation lists.
+#
+# A trigger on reviews marks the writer's list stale and records when they
+# were last active, so reviews from any worker, script or import are seen.
+# Timestamps are stored as sortable '%Y-%m-%d %H:%M:%f' text, and the job
+# only clears a stale flag if active_at hasn't moved since it read it, so
+# a review written while a list is being computed keeps it stale.
+
+NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+STALE_TRIGGER_DDL = f"""
+    CREATE TRIGGER IF NOT EXISTS reviews_recommendations_stale AFTER INSERT ON reviews
+    WHEN new.user_id IS NOT NULL BEGIN
+        INSERT INTO user_recommendation_state (user_id, stale, active_at)
+        VALUES (new.user_id, 1, {NOW})
+        ON CONFLICT (user_id) DO UPDATE SET stale = 1, active_at = excluded.active_at;
+    END
+"""
+
+
+# A user without a list asked for one: marked stale and active now, so the
+# job takes them first in whichever worker runs it. Users already waiting
+# are left alone, and unknown ids get no row.
+REQUEST_SQL = f"""
+    INSERT INTO user_recommendation_state (user_id, stale, active_at)
+    SELECT id, 1, {NOW} FROM users WHERE id = :user_id
+    ON CONFLICT (user_id) DO UPDATE SET stale = 1, active_at = excluded.active_at
+    WHERE user_recommendation_state.stale = 0
+"""
+
+
+def create_recommendation_triggers(conn: Connection):
+    conn.execute(text(STALE_TRIGGER_DDL))
+    # Everyone who has reviewed something needs a first list, the most
+    # recent reviewers first
+    conn.execute(text(
+        "INSERT OR IGNORE INTO user_recommendation_state (user_id, stale, active_at) "
+        "SELECT user_id, 1, COALESCE(MAX(created_at), " + NOW + ") "
+        "FROM reviews WHERE user_id IS NOT NULL GROUP BY user_id"
+    ))
+
+
+async def request_user_recommendations(db: AsyncSession, user_id: int):
+    await db.execute(text(REQUEST_SQL), {"user_id": user_id})
+
+
+async def get_user_recommendations(db: AsyncSession, user_id: int, limit: int) -> list:
+    rows = await db.execute(
+        text(
+            "SELECT movie_id FROM user_recommendations "
+            "WHERE user_id = :user_id ORDER BY rank LIMIT :limit"
+        ),
+        {"user_id": user_id, "limit": limit}
+    )
+    return [row[0] for row in rows]
+
+
+def pick_users(conn: Connection, limit: int, max_age_hours: float) -> dict:
+    # {user_id: active_at} of users whose list should be (re)computed:
+    # stale users by recent activity (which puts users who just asked for
+    # a list first), then the oldest lists once they're older than
+    # max_age_hours
+    rows = conn.execute(
+        text(
+            "SELECT user_id, active_at FROM user_recommendation_state "
+            "WHERE stale = 1 ORDER BY active_at DESC LIMIT :limit"
+        ),
+        {"limit": limit}
+    )
+    picked = dict(rows.all())
+    if len(picked) < limit:
+        rows = conn.execute(
+            text(
+                "SELECT user_id, active_at FROM user_recommendation_state "
+                "WHERE stale = 0 AND computed_at < strftime('%Y-%m-%d %H:%M:%f', 'now', :age) "
+                "ORDER BY computed_at LIMIT :limit"
+            ),
+            {"age": f"-{max_age_hours} hours", "limit": limit - len(picked)}
+        )
+        picked.update(rows.all())
+    return picked
+
+
+def save_user_recommendations(conn: Connection, lists: dict, seen: dict):
+    # lists: {user_id: [movie_id, ...]}, seen: {user_id: active_at as read}
+    user_ids = list(lists)
+    if not user_ids:
+        return
+    conn.execute(
+        text("DELETE FROM user_recommendations WHERE user_id IN :ids").bindparams(bindparam("ids", expanding=True)),
+        {"ids": user_ids}
+    )
+    rows = [
+        {"user_id": user_id, "rank": rank, "movie_id": movie_id}
+        for user_id, movie_ids in lists.items()
+        for rank, movie_id in enumerate(movie_ids)
+    ]
+    if rows:
+        conn.execute(
+            text("INSERT INTO user_recommendations (user_id, rank, movie_id) VALUES (:user_id, :rank, :movie_id)"),
+            rows
+        )
+    conn.execute(
+        text(
+            f"INSERT INTO user_recommendation_state (user_id, stale, active_at, computed_at) "
+            f"VALUES (:user_id, 0, COALESCE(:active_at, {NOW}), {NOW}) "
+            f"ON CONFLICT (user_id) DO UPDATE SET computed_at = excluded.computed_at, "
+            "stale = CASE WHEN user_recommendation_state.active_at IS :active_at THEN 0 ELSE 1 END"
+        ),
+        [{"user_id": user_id, "active_at": seen.get(user_id)} for user_id in user_ids]
+    )
+
+
+def load_genre_popularity(conn: Connection, size: int) -> dict:
+    # {genre_id: [movie_id, ...]}, most reviewed first, for cold users
+    rows = conn.execute(
+        text(
+            "SELECT genre_id, movie_id FROM ("
+            "SELECT mg.genre_id, m.id AS movie_id, ROW_NUMBER() OVER ("
+            "PARTITION BY mg.genre_id ORDER BY m.review_count DESC, m.rating_average DESC, m.id"
+            ") AS position FROM movie_genre mg JOIN movies m ON m.id = mg.movie_id"
+            ") WHERE position <= :size ORDER BY genre_id, position"
+        ),
+        {"size": size}
+    )
+    popular = {}
+    for genre_id, movie_id in rows:
+        popular.setdefault(genre_id, []).append(movie_id)
+    return popular
+
+
+def genre_weights_query(user_ids):
+    # (user_id, genre_id, number of the user's reviews in that genre)
+    return (
+        select(Review.user_id, movie_genre.c.genre_id, func.count())
+        .join(movie_genre, movie_genre.c.movie_id == Review.movie_id)
+        .where(Review.user_id.in_(user_ids))
+        .group_by(Review.user_id, movie_genre.c.genre_id)
+    )
@@ -0,0 +1,178 @@
+import threading
+import time
+from functools import cached_property
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.database.sqlite import SQLiteProfile, apply_sqlite_profile
+
+# The one place engines are created. Every module resolves its engine and
+# sessions through the registry, so there is exactly one pool per driver
+# (sync for scripts/migrations, aiosqlite for request handlers) on one
+# database URL, and both pools report what they are doing.
+
+
+class PoolStats:
+    # Counters fed by the pool: checkouts, how long callers waited for a
+    # connection, how often they gave up, and the high-water marks
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.connections_opened = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.waits += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def record_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def record_checkin(self):
+        with self._lock:
+            self.checked_out -= 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            return {
+                "pool_size": pool.size(),
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "checkouts": self.checkouts,
+                "connections_opened": self.connections_opened,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.waits * 1000, 3) if self.waits else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class _TimedPoolMixin:
+    # Times the wait for a free connection, which pool events can't see:
+    # "checkout" only fires once a connection has been handed over
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _track_pool(engine):
+    stats = engine.pool.stats
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.record_checkout()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        stats.record_checkin()
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats.record_connect()
+
+
+def async_url(url: str) -> str:
+    # sqlite:///movies.db -> sqlite+aiosqlite:///movies.db
+    scheme, _, rest = url.partition("://")
+    if "+" in scheme:
+        scheme = scheme.split("+", 1)[0]
+    driver = {"sqlite": "aiosqlite"}.get(scheme)
+    if driver is None:
+        raise ValueError(f"No async driver configured for {scheme!r} URLs")
+    return f"{scheme}+{driver}://{rest}"
+
+
+class EngineRegistry:
+    def __init__(self, url: str, profile: SQLiteProfile):
+        self.url = url
+        self.profile = profile
+
+    # Synchronous engine for scripts, migrations and seeding
+    @cached_property
+    def engine(self):
+        engine = create_engine(
+            self.url,
+            connect_args={"check_same_thread": False},
+            poolclass=TimedQueuePool,
+            **self.profile.pool_options()
+        )
+        apply_sqlite_profile(engine, self.profile)
+        _track_pool(engine)
+        return engine
+
+    # Request handlers use the async engine so a slow query only suspends
+    # the request that issued it instead of blocking the event loop
+    # (aiosqlite defaults to NullPool, i.e. a new connection and a fresh
+    # set of pragmas per checkout, so the queue pool is requested explicitly)
+    @cached_property
+    def async_engine(self):
+        engine = create_async_engine(
+            async_url(self.url),
+            poolclass=TimedAsyncAdaptedQueuePool,
+            **self.profile.pool_options()
+        )
+        apply_sqlite_profile(engine.sync_engine, self.profile)
+        _track_pool(engine.sync_engine)
+        return engine
+
+    @cached_property
+    def session_factory(self):
+        return sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+    @cached_property
+    def async_session_factory(self):
+        return async_sessionmaker(
+            self.async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+
+    def pool_stats(self) -> dict:
+        stats = {}
+        if "engine" in self.__dict__:
+            stats["sync"] = self.engine.pool.stats.snapshot(self.engine.pool)
+        if "async_engine" in self.__dict__:
+            pool = self.async_engine.sync_engine.pool
+            stats["async"] = pool.stats.snapshot(pool)
+        return stats
+
@@ -0,0 +1,98 @@
+import os
+from dataclasses import dataclass
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+
+# Connection-level SQLite tuning, applied to every new DBAPI connection
+# through a "connect" event so sync and async engines get the same settings.
+#
+# WAL lets readers keep reading while a review is being written (the
+# default rollback journal locks the whole file for the duration of every
+# write), and synchronous=NORMAL is durable in WAL mode except for the last
+# transactions before a power loss. mmap and a larger page cache keep hot
+# catalog pages out of read() calls, busy_timeout makes writers wait for
+# the lock instead of failing with "database is locked", and temp_store
+# keeps sort/temp b-trees in memory.
+#
+# Pool sizing: WAL allows any number of concurrent readers but still only
+# one writer, so the pool is sized for read concurrency (one connection per
+# in-flight request up to pool_size + max_overflow) and callers beyond
+# that wait up to pool_timeout seconds rather than opening more files.
+
+
+@dataclass(frozen=True)
+class SQLiteProfile:
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size: int = -64 * 1024  # negative = KiB, i.e. 64 MiB per connection
+    busy_timeout: int = 5000  # ms
+    temp_store: str = "MEMORY"
+    pool_size: int = 8
+    max_overflow: int = 8
+    pool_timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls):
+        defaults = cls()
+        return cls(
+            journal_mode=os.getenv("SQLITE_JOURNAL_MODE", defaults.journal_mode),
+            synchronous=os.getenv("SQLITE_SYNCHRONOUS", defaults.synchronous),
+            mmap_size=int(os.getenv("SQLITE_MMAP_SIZE", defaults.mmap_size)),
+            cache_size=int(os.getenv("SQLITE_CACHE_SIZE", defaults.cache_size)),
+            busy_timeout=int(os.getenv("SQLITE_BUSY_TIMEOUT", defaults.busy_timeout)),
+            temp_store=os.getenv("SQLITE_TEMP_STORE", defaults.temp_store),
+            pool_size=int(os.getenv("DB_POOL_SIZE", defaults.pool_size)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", defaults.max_overflow)),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", defaults.pool_timeout)),
+        )
+
+    def pragmas(self) -> list:
+        return [
+            f"PRAGMA journal_mode = {self.journal_mode}",
+            f"PRAGMA synchronous = {self.synchronous}",
+            f"PRAGMA mmap_size = {self.mmap_size}",
+            f"PRAGMA cache_size = {self.cache_size}",
+            f"PRAGMA busy_timeout = {self.busy_timeout}",
+            f"PRAGMA temp_store = {self.temp_store}",
+        ]
+
+    def pool_options(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+        }
+
+
+# SQLite's own defaults, kept for comparison in benchmarks
+DEFAULT_SQLITE_PROFILE = SQLiteProfile(
+    journal_mode="DELETE",
+    synchronous="FULL",
+    mmap_size=0,
+    cache_size=-2000,
+    busy_timeout=5000,
+    temp_store="DEFAULT",
+)
+
+
+def apply_sqlite_profile(engine, profile: SQLiteProfile):
+    # Accepts an Engine or the sync_engine of an AsyncEngine
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in profile.pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def begin_immediate(conn: Connection):
+    # pysqlite only opens a transaction by itself right before an INSERT,
+    # UPDATE or DELETE, so reads and DDL before that (DROP TRIGGER, DROP
+    # INDEX) run in autocommit. Code that needs them in the same
+    # transaction as its writes begins it explicitly, taking the write
+    # lock up front.
+    if not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
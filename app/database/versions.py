@@ -0,0 +1,57 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Per-table change counters. SQLite triggers bump a table's version on
+# every insert, update or delete, so writes from any worker, script or
+# bulk import are seen. Readers compare the versions a cached value was
+# built from with the current ones to know whether it is still valid.
+VERSIONED_TABLES = ("movies", "genres", "movie_genre", "reviews", "users")
+
+# Every review write updates its movie's rating aggregates, and most cached
+# listings don't depend on them. Updates of those columns bump their own
+# counter, "movie_ratings", and only updates of the movie's own data bump
+# "movies" (inserts and deletes bump both).
+MOVIE_RATINGS_VERSION = "movie_ratings"
+MOVIE_CONTENT_COLUMNS = ("title", "director", "year", "synopsis")
+MOVIE_RATING_COLUMNS = ("rating_sum", "rating_average", "review_count", "weighted_score")
+
+
+def _version_trigger(name: str, event: str, table: str, counters) -> str:
+    bumps = " ".join(
+        f"UPDATE table_versions SET version = version + 1 WHERE name = '{counter}';" for counter in counters
+    )
+    return f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN {bumps} END"
+
+
+def create_version_triggers(conn: Connection):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS table_versions ("
+        "name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0"
+        ") WITHOUT ROWID"
+    ))
+    for table in VERSIONED_TABLES + (MOVIE_RATINGS_VERSION,):
+        conn.execute(
+            text("INSERT OR IGNORE INTO table_versions (name, version) VALUES (:name, 0)"),
+            {"name": table}
+        )
+    for table in VERSIONED_TABLES:
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            event, counters = operation, (table,)
+            if table == "movies" and operation == "UPDATE":
+                event = f"UPDATE OF {', '.join(MOVIE_CONTENT_COLUMNS)}"
+            elif table == "movies":
+                counters = (table, MOVIE_RATINGS_VERSION)
+            conn.execute(text(_version_trigger(f"{table}_version_{operation.lower()}", event, table, counters)))
+    conn.execute(text(_version_trigger(
+        "movies_ratings_version_update", f"UPDATE OF {', '.join(MOVIE_RATING_COLUMNS)}", "movies",
+        (MOVIE_RATINGS_VERSION,)
+    )))
+
+
+async def get_table_versions(db: AsyncSession, tables) -> tuple:
+    rows = await db.execute(
+        text("SELECT name, version FROM table_versions")
+    )
+    versions = dict(rows.all())
+    return tuple(versions.get(table, 0) for table in tables)
@@ -0,0 +1,122 @@
+import asyncio
+import os
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.database import AsyncSessionLocal
+
+# Group commit: one writer task per process owns every write transaction.
+#
+# Handlers submit a command, an async function of a session, and await its
+# result. The writer takes whatever has queued up while the previous batch
+# was committing (up to WRITE_BATCH_SIZE commands) and runs it as one
+# transaction, each command inside its own SAVEPOINT so one that fails is
+# rolled back alone and only its caller sees the error. Results are handed
+# out after the COMMIT, i.e. once the write is durable. Under load, batches
+# grow on their own and one fsync covers many writes; with no load a
+# command is committed on its own, without waiting for company.
+#
+# Commands run on the writer's session, never on the request's: they must
+# not hold on to it, and should return plain values (or objects whose
+# attributes are already loaded).
+
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "64"))
+WRITE_QUEUE_SIZE = int(os.getenv("WRITE_QUEUE_SIZE", "1024"))
+
+
+class WriteQueue:
+    def __init__(self, session_factory: async_sessionmaker, batch_size: int = WRITE_BATCH_SIZE,
+                 maxsize: int = WRITE_QUEUE_SIZE):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.maxsize = maxsize
+        self._queue = None
+        self._task = None
+        self._loop = None
+        self.commands = 0
+        self.failed_commands = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.max_batch = 0
+
+    def _ensure_writer(self):
+        # Started on first use, on the loop of the caller
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(self.maxsize)
+            self._task = loop.create_task(self._run())
+
+    async def submit(self, command):
+        self._ensure_writer()
+        future = self._loop.create_future()
+        # Waits while the queue is full, which pushes back on the callers
+        await self._queue.put((command, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            # None is close()'s stop marker
+            stop = None in batch
+            batch = [item for item in batch if item is not None]
+            if batch:
+                await self._commit(batch)
+            if stop:
+                return
+
+    async def _commit(self, batch):
+        outcomes = []
+        try:
+            async with self.session_factory() as session:
+                # pysqlite doesn't begin a transaction before a SAVEPOINT, so
+                # without this the first savepoint would open it and its
+                # RELEASE would commit that command on its own
+                await (await session.connection()).exec_driver_sql("BEGIN IMMEDIATE")
+                for command, future in batch:
+                    if future.cancelled():
+                        # The caller went away before its write started
+                        continue
+                    try:
+                        async with session.begin_nested():
+                            outcomes.append((future, await command(session), None))
+                    except Exception as exc:
+                        outcomes.append((future, None, exc))
+                await session.commit()
+        except Exception as exc:
+            # Nothing in the batch was committed
+            self.failed_batches += 1
+            outcomes = [(future, None, exc) for _, future in batch]
+
+        for future, result, exc in outcomes:
+            if future.done():
+                continue
+            if exc is not None:
+                self.failed_commands += 1
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+        self.commands += len(batch)
+        self.batches += 1
+        self.max_batch = max(self.max_batch, len(batch))
+
+    async def close(self):
+        # Commits what is already queued, then stops the writer
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(None)
+        await self._task
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "commands": self.commands,
+            "failed_commands": self.failed_commands,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "avg_batch": round(self.commands / self.batches, 2) if self.batches else 0.0,
+            "max_batch": self.max_batch,
+        }
+
+
+write_queue = WriteQueue(AsyncSessionLocal)
@@ -1,25 +1,61 @@
-from typing import Generator, Optional
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.cache import LRUCache
+from app.database import get_db
 from app.models.models import User
 from app.security.security import SECRET_KEY, ALGORITHM
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def get_db() -> Generator:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Resolved principals, keyed by a digest of the bearer token so raw tokens
+# are never held in memory. The JWT itself is still verified on every
+# request; the cache only saves the users lookup behind it.
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    id: int
+    email: str
+    username: Optional[str]
+
+principal_cache = LRUCache(PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def invalidate_user(user_id: int) -> int:
+    return principal_cache.discard_where(lambda principal: principal.id == user_id)
+
+# Drop cached principals once a change to their user row is committed, so
+# a concurrent request can't re-cache the old row between flush and commit
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = {obj.id for obj in list(session.dirty) + list(session.deleted) if isinstance(obj, User)}
+    if changed:
+        session.info.setdefault("changed_user_ids", set()).update(changed)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        invalidate_user(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop("changed_user_ids", None)
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_db)
+) -> AuthenticatedUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -32,8 +68,15 @@ async def get_current_user(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-        
-    user = db.query(User).filter(User.email == email).first()
+
+    digest = token_digest(token)
+    principal = principal_cache.get(digest)
+    if principal is not None and principal.email == email:
+        return principal
+
+    user = await db.scalar(select(User).where(User.email == email))
     if user is None:
         raise credentials_exception
-    return user 
\ No newline at end of file
+    principal = AuthenticatedUser(id=user.id, email=user.email, username=user.username)
+    principal_cache.set(digest, principal)
+    return principal
@@ -0,0 +1,41 @@
+import hashlib
+from fastapi import Request, Response
+
+# Strong ETags for API responses built from the table version counters.
+# The tag covers the route, the request parameters that shape the
+# response and the versions of every table the response is read from, so
+# it changes exactly when the representation can change.
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/"x" matches "x". The
+    # compression middleware suffixes tags of encoded bodies ("x-gzip"),
+    # which still identify the same representation.
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(_strip_encoding(tag.removeprefix("W/")) == etag for tag in candidates)
+
+
+def _strip_encoding(tag: str) -> str:
+    for suffix in ('-gzip"', '-br"'):
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def cache_headers(etag: str) -> dict:
+    # Let clients keep the body but make them revalidate every time
+    return {"ETag": etag, "Cache-Control": "no-cache"}
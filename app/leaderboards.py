@@ -0,0 +1,227 @@
+import asyncio
+import heapq
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from app.database import engine
+from app.database.aggregates import refresh_rating_prior
+from app.database.sqlite import begin_immediate
+from app.models.models import Genre, Movie, Review, movie_genre, rating_prior
+
+# Top-N movies per genre and per decade, ranked like /movies/top/ by
+# Movie.weighted_score (see app.database.aggregates) and held in memory,
+# so serving a board is a dict lookup and a slice.
+#
+# Each board keeps the best LEADERBOARD_DEPTH movies of its bucket, more
+# than the LEADERBOARD_SIZE it serves, so a movie sliding out of the top
+# rarely forces a rescan of the bucket. Boards are updated incrementally:
+# reviews are only ever inserted, so the movies whose score moved are the
+# ones reviewed above the last review id seen, whichever worker or script
+# wrote them. Only those movies are re-read and moved. Rebuilding the
+# aggregates changes the rating prior and with it every score, so a new
+# prior triggers a full reload instead. Refreshes also recompute the prior
+# every RATING_PRIOR_REFRESH_SECONDS, rescoring every movie if it drifted.
+
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "100"))
+LEADERBOARD_DEPTH = 2 * LEADERBOARD_SIZE
+LEADERBOARD_REFRESH_SECONDS = float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "2"))
+RATING_PRIOR_REFRESH_SECONDS = float(os.getenv("RATING_PRIOR_REFRESH_SECONDS", "300"))
+# Same cut-off as the "older" year filter of GET /movies/
+OLDER = "older"
+OLDER_BEFORE = 1970
+# Movies re-read per query during an incremental refresh
+REFRESH_CHUNK = 500
+
+
+def board_keys(year, genre_ids) -> tuple:
+    keys = [("genre", genre_id) for genre_id in genre_ids]
+    if year is not None:
+        keys.append(("decade", year // 10 * 10))
+        if year < OLDER_BEFORE:
+            keys.append(("decade", OLDER))
+    return tuple(keys)
+
+
+def _entry(movie_id: int, score: float) -> tuple:
+    # Ascending order of entries is best first: score desc, then id desc
+    return (-score, -movie_id)
+
+
+class Leaderboards:
+    def __init__(self, engine: Engine, refresh_seconds: float = LEADERBOARD_REFRESH_SECONDS):
+        self.engine = engine
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # movie_id -> (score, board keys) for every reviewed movie
+        self.movies = {}
+        # board key -> best entries, and whether they are the whole bucket
+        self.boards = {}
+        self.complete = {}
+        self.genre_ids = {}
+        self.prior = None
+        self.last_review_id = 0
+        self.loaded_at = None
+        self.refreshed_at = 0.0
+        self.prior_checked_at = 0.0
+        self.loads = 0
+        self.refreshes = 0
+        self.rescans = 0
+        self.load_seconds = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded_at is not None
+
+    def _read_movies(self, conn, movie_ids=None) -> dict:
+        movies = select(Movie.id, Movie.year, Movie.weighted_score).where(Movie.review_count > 0)
+        links = select(movie_genre.c.movie_id, movie_genre.c.genre_id)
+        if movie_ids is None:
+            links = links.join(Movie, Movie.id == movie_genre.c.movie_id).where(Movie.review_count > 0)
+        else:
+            movies = movies.where(Movie.id.in_(movie_ids))
+            links = links.where(movie_genre.c.movie_id.in_(movie_ids))
+        genres = defaultdict(list)
+        for movie_id, genre_id in conn.execute(links):
+            genres[movie_id].append(genre_id)
+        return {
+            movie_id: (score or 0.0, board_keys(year, genres[movie_id]))
+            for movie_id, year, score in conn.execute(movies)
+        }
+
+    def load(self):
+        started = time.perf_counter()
+        with self.engine.connect() as conn:
+            prior = tuple(conn.execute(select(rating_prior.c.mean, rating_prior.c.votes)).first() or ())
+            last_review_id = conn.execute(select(func.max(Review.id))).scalar() or 0
+            genre_ids = {name.lower(): genre_id for genre_id, name in conn.execute(select(Genre.id, Genre.name))}
+            movies = self._read_movies(conn)
+
+        buckets = defaultdict(list)
+        for movie_id, (score, keys) in movies.items():
+            for key in keys:
+                buckets[key].append(_entry(movie_id, score))
+        boards, complete = {}, {}
+        for key, entries in buckets.items():
+            boards[key] = heapq.nsmallest(LEADERBOARD_DEPTH, entries)
+            complete[key] = len(entries) <= LEADERBOARD_DEPTH
+
+        with self._lock:
+            self.movies, self.boards, self.complete = movies, boards, complete
+            self.genre_ids, self.prior, self.last_review_id = genre_ids, prior, last_review_id
+            self.loaded_at = self.refreshed_at = time.time()
+        self.load_seconds = time.perf_counter() - started
+        self.loads += 1
+
+    def _check_prior(self):
+        if time.time() - self.prior_checked_at < RATING_PRIOR_REFRESH_SECONDS:
+            return
+        with self.engine.connect() as conn:
+            begin_immediate(conn)
+            refresh_rating_prior(conn)
+            conn.commit()
+        self.prior_checked_at = time.time()
+
+    def refresh(self):
+        # A rescored prior is picked up below as a prior change
+        self._check_prior()
+        if not self.ready:
+            self.load()
+            return
+        with self.engine.connect() as conn:
+            prior = tuple(conn.execute(select(rating_prior.c.mean, rating_prior.c.votes)).first() or ())
+            if prior == self.prior:
+                changed = conn.execute(
+                    select(Review.movie_id, func.max(Review.id))
+                    .where(Review.id > self.last_review_id, Review.movie_id.is_not(None))
+                    .group_by(Review.movie_id)
+                ).all()
+                movie_ids = [movie_id for movie_id, _ in changed]
+                movies = {}
+                for start in range(0, len(movie_ids), REFRESH_CHUNK):
+                    movies.update(self._read_movies(conn, movie_ids[start:start + REFRESH_CHUNK]))
+                # A reviewed movie may have been imported with a new genre
+                genre_ids = {name.lower(): genre_id for genre_id, name in conn.execute(select(Genre.id, Genre.name))}
+        if prior != self.prior:
+            self.load()
+            return
+
+        with self._lock:
+            for movie_id, (score, keys) in movies.items():
+                self._move(movie_id, score, keys)
+            self.genre_ids = genre_ids
+            if changed:
+                self.last_review_id = max(last for _, last in changed)
+            self.refreshed_at = time.time()
+        self.refreshes += 1
+
+    def _move(self, movie_id: int, score: float, keys: tuple):
+        # Each board is a prefix of its bucket's ranking; keep it one
+        old = self.movies.get(movie_id)
+        self.movies[movie_id] = (score, keys)
+        entry = _entry(movie_id, score)
+        for key in set(keys) | set(old[1] if old else ()):
+            board = self.boards.setdefault(key, [])
+            complete = self.complete.setdefault(key, True)
+            if old:
+                position = bisect_left(board, _entry(movie_id, old[0]))
+                if position < len(board) and board[position] == _entry(movie_id, old[0]):
+                    del board[position]
+            if key in keys and (complete or (board and entry < board[-1])):
+                insort(board, entry)
+                if len(board) > LEADERBOARD_DEPTH:
+                    board.pop()
+                    self.complete[key] = False
+            if len(board) < LEADERBOARD_SIZE and not self.complete[key]:
+                self._rescan(key)
+
+    def _rescan(self, key):
+        entries = [_entry(movie_id, score) for movie_id, (score, keys) in self.movies.items() if key in keys]
+        self.boards[key] = heapq.nsmallest(LEADERBOARD_DEPTH, entries)
+        self.complete[key] = len(entries) <= LEADERBOARD_DEPTH
+        self.rescans += 1
+
+    def refresh_if_due(self):
+        # Only the first load makes callers wait; later refreshes are
+        # skipped while another one is running
+        if not self._refresh_lock.acquire(blocking=not self.ready):
+            return
+        try:
+            if not self.ready or time.time() - self.refreshed_at >= self.refresh_seconds:
+                self.refresh()
+        finally:
+            self._refresh_lock.release()
+
+    async def ensure_fresh(self):
+        if self.ready and time.time() - self.refreshed_at < self.refresh_seconds:
+            return
+        await asyncio.to_thread(self.refresh_if_due)
+
+    def top(self, genre: str = None, decade=None, limit: int = LEADERBOARD_SIZE) -> list:
+        if genre is not None:
+            key = ("genre", self.genre_ids.get(genre.lower()))
+        else:
+            key = ("decade", decade)
+        with self._lock:
+            board = self.boards.get(key, [])
+            return [-movie_id for _, movie_id in board[:min(limit, LEADERBOARD_SIZE)]]
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "boards": len(self.boards),
+            "movies": len(self.movies),
+            "last_review_id": self.last_review_id,
+            "loads": self.loads,
+            "refreshes": self.refreshes,
+            "rescans": self.rescans,
+            "load_seconds": round(self.load_seconds, 3),
+            "refreshed_at": self.refreshed_at,
+        }
+
+
+leaderboards = Leaderboards(engine)
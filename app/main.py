@@ -1,58 +1,103 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, Request, status, Form
-from sqlalchemy.orm import Session
+import time
+
+# Startup is timed from here, so the imports below count towards the budget
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Query, Request, Response, status, Form
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Annotated
 from app.models import Movie, User, Review, Genre, Watchlist
 from app import schemas  # Make sure this import is correct
-from app.database import SessionLocal, engine, Base, get_db
-from app.dependencies import get_current_user
+from app.database import get_db, registry
+from app.dependencies import get_current_user, AuthenticatedUser, principal_cache
 from datetime import datetime, timedelta
-from sqlalchemy import func, case
+from sqlalchemy import func, case, select
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse
-from app.data.sample_data import init_db
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from app.data.sample_data import init_db as init_sample_data
 from app.security.security import verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from app import models
 from app.schemas.schemas import UserCreate  # Make sure this import exists
-from app.database.seed import seed_data
 from app.schemas.schemas import MovieBase, MovieResponse, MovieCreate, Genre  # Updated import
 from app.security.utils import authenticate_user
+from app.security.hashing import password_hasher, PasswordHasherOverloaded
 from pathlib import Path
+import asyncio
+import os
 from app.models.models import Genre as GenreModel  # Add this import at the top
-from app.database.init_db import init_db, seed_data
-from app.database.database import SessionLocal
-
-# Create tables
-Base.metadata.create_all(bind=engine)
-
-# Initialize database and seed data
-init_db()
-db = SessionLocal()
-seed_data(db)
-db.close()
-
-app = FastAPI(title="Movie Rating System")
-
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+from app.database.fts import search_movie_ids
+from app.database.aggregates import record_rating
+from app.database.loading import load_genre_names
+from app.database.versions import MOVIE_RATINGS_VERSION, get_table_versions
+from app.cache import LRUCache
+from app.etag import make_etag, etag_matches, not_modified, cache_headers
+from app.compression import CompressionMiddleware
+from app.static_assets import load_manifest, make_static_url, PrecompressedStaticFiles, DIST_DIR
+from app.bootstrap import check_database_ready, check_startup_budget
+from app.recommender import recommender, RECOMMENDATION_JOB_ENABLED
+from app.leaderboards import leaderboards, LEADERBOARD_SIZE
+from app.trending import trending, TRENDING_SIZE
+from app.counters import review_likes
+from app.database.writer import write_queue
+from app.database.recommendations import get_user_recommendations, genre_weights_query, request_user_recommendations
+from app.database.pagination import paginate_movies, InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+router = APIRouter()
 
 # Templates
 templates = Jinja2Templates(directory="app/templates")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Catalog pages keyed by normalized filters. Each entry remembers the table
+# versions it was built from and is only served while they are unchanged,
+# so movie and genre writes invalidate exactly the listing data. Reviews
+# only move the rating version, which rating-sorted pages are keyed on.
+MOVIE_LIST_TABLES = ("movies", "genres", "movie_genre")
+movie_list_cache = LRUCache(int(os.getenv("MOVIE_LIST_CACHE_SIZE", "1024")))
+# Reviews of a movie are served newest first, a page at a time
+REVIEW_PAGE_SIZE = 50
+
+async def password_hasher_overloaded(request: Request, exc: PasswordHasherOverloaded):
+    # Shed login/registration load early instead of queueing it
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many password operations in progress, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
+async def database_pool_exhausted(request: Request, exc: PoolTimeoutError):
+    # Every pooled connection stayed busy for DB_POOL_TIMEOUT seconds
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database is busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
+def movie_summary(movie, genre_names):
+    return {
+        "id": movie.id,
+        "title": movie.title,
+        "director": movie.director,
+        "year": movie.year,
+        "genres": genre_names[movie.id]
+    }
+
 # Frontend route
-@app.get("/")
+@router.get("/")
 async def root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
-@app.get("/movies")
+@router.get("/movies")
 async def movies_page(request: Request):
     return RedirectResponse(url="/", status_code=303)
 
 # API routes
-@app.get("/api")
+@router.get("/api")
 async def read_root():
     return {
         "message": "Welcome to the Movie Rating System API!",
@@ -64,245 +109,389 @@ async def read_root():
         }
     }
 
-@app.post("/genres/", response_model=schemas.Genre)
-def create_genre(genre: schemas.GenreCreate, db: Session = Depends(get_db)):
-    db_genre = Genre(name=genre.name)
-    db.add(db_genre)
-    db.commit()
-    db.refresh(db_genre)
+@router.post("/genres/", response_model=schemas.Genre)
+async def create_genre(genre: schemas.GenreCreate):
+    db_genre = models.Genre(name=genre.name)
+
+    async def insert_genre(session):
+        session.add(db_genre)
+        await session.flush()
+
+    await write_queue.submit(insert_genre)
     return db_genre
 
-@app.post("/users/", response_model=schemas.UserResponse)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+@router.post("/users/", response_model=schemas.UserResponse)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if email exists
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+    db_user = await db.scalar(select(models.User).where(models.User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    
+
     # Check if username exists
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
+    db_user = await db.scalar(select(models.User).where(models.User.username == user.username))
     if db_user:
         raise HTTPException(status_code=400, detail="Username already taken")
-    
-    hashed_password = get_password_hash(user.password)
+
+    hashed_password = await password_hasher.hash(user.password)
     db_user = models.User(
         email=user.email,
         username=user.username,
         hashed_password=hashed_password
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+
+    async def insert_user(session):
+        session.add(db_user)
+        await session.flush()
+
+    await write_queue.submit(insert_user)
     return db_user
 
-@app.post("/movies/", response_model=schemas.MovieResponse)
-async def create_movie(movie: schemas.MovieCreate, db: Session = Depends(get_db)):
+@router.post("/movies/", response_model=schemas.MovieResponse)
+async def create_movie(movie: schemas.MovieCreate):
     db_movie = Movie(
         title=movie.title,
         director=movie.director,
         year=movie.year,
         synopsis=movie.synopsis
     )
-    
-    # Add genres
-    genres = db.query(Genre).filter(Genre.id.in_(movie.genre_ids)).all()
-    db_movie.genres = genres
-    
-    db.add(db_movie)
-    db.commit()
-    db.refresh(db_movie)
-    return db_movie
-
-@app.post("/reviews/", response_model=schemas.ReviewResponse)
+
+    async def insert_movie(session):
+        # Genres are loaded on the writer's session to be linked from it
+        genres = (await session.scalars(select(models.Genre).where(models.Genre.id.in_(movie.genre_ids)))).all()
+        db_movie.genres = genres
+        session.add(db_movie)
+        await session.flush()
+        return genres
+
+    genres = await write_queue.submit(insert_movie)
+    return {
+        "id": db_movie.id,
+        "title": db_movie.title,
+        "director": db_movie.director,
+        "year": db_movie.year,
+        "genres": [genre.name for genre in genres]
+    }
+
+@router.post("/reviews/", response_model=schemas.ReviewResponse)
 async def create_review(
     review: schemas.ReviewCreate,
     user_id: int,
-    db: Session = Depends(get_db)
+    movie_id: int,
+    db: AsyncSession = Depends(get_db)
 ):
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
     db_review = Review(
         **review.dict(),
+        movie_id=movie_id,
         user_id=user_id
     )
-    db.add(db_review)
-    
-    # Update movie rating average
-    movie = db.query(Movie).filter(Movie.id == review.movie_id).first()
-    if not movie:
-        raise HTTPException(status_code=404, detail="Movie not found")
-    
-    movie.review_count += 1
-    avg_rating = db.query(func.avg(Review.rating))\
-        .filter(Review.movie_id == review.movie_id)\
-        .scalar()
-    movie.rating_average = float(avg_rating)
-    
-    db.commit()
-    db.refresh(db_review)
-    return db_review
-
-@app.get("/movies/", response_model=List[schemas.MovieResponse])
+
+    async def insert_review(session):
+        # Update movie rating aggregates in the same transaction as the insert
+        if (await record_rating(session, movie_id, review.rating)).rowcount == 0:
+            raise HTTPException(status_code=404, detail="Movie not found")
+        session.add(db_review)
+        await session.flush()
+
+    await write_queue.submit(insert_review)
+    return {
+        "id": db_review.id,
+        "rating": db_review.rating,
+        "comment": db_review.comment,
+        "created_at": db_review.created_at,
+        "user_id": db_review.user_id,
+        "movie_id": db_review.movie_id,
+        "user_username": user.username
+    }
+
+def normalize_movie_filters(search: str, genre: str, year: str):
+    # Collapse equivalent requests onto one cache key
+    search = search.strip()
+    if not genre or genre == "All Genres":
+        genre = None
+    if year == "older":
+        decade = "older"
+    else:
+        try:
+            decade = int(year) // 10 * 10
+        except ValueError:
+            decade = None
+    return search, genre, decade
+
+def rating_fields(rating_average, review_count) -> dict:
+    return {
+        "average_rating": round(rating_average, 1) if review_count else None,
+        "review_count": review_count or 0
+    }
+
+async def refresh_page_ratings(db: AsyncSession, page: schemas.MoviePage) -> schemas.MoviePage:
+    # One primary-key lookup for the page's own movies
+    ids = [item.id for item in page.items]
+    if not ids:
+        return page
+    rows = await db.execute(
+        select(models.Movie.id, models.Movie.rating_average, models.Movie.review_count)
+        .where(models.Movie.id.in_(ids))
+    )
+    ratings = {movie_id: rating_fields(average, count) for movie_id, average, count in rows}
+    return page.model_copy(update={
+        "items": [item.model_copy(update=ratings.get(item.id, {})) for item in page.items]
+    })
+
+@router.get("/movies/", response_model=schemas.MoviePage)
 async def get_movies(
-    search: str = "", 
+    request: Request,
+    response: Response,
+    search: str = "",
     genre: str = "All Genres",
     year: str = "all",
-    db: Session = Depends(get_db)
+    sort: str = Query("title", pattern="^(title|year|rating)$"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    # Start with a subquery to calculate average ratings
-    ratings_subquery = (
-        db.query(
-            models.Review.movie_id,
-            func.avg(models.Review.rating).label('average_rating'),
-            func.count(models.Review.id).label('review_count')
-        )
-        .group_by(models.Review.movie_id)
-        .subquery()
-    )
+    search, genre, decade = normalize_movie_filters(search, genre, year)
+    cache_key = (search.lower(), genre, decade, sort, limit, cursor)
+    versions = await get_table_versions(db, MOVIE_LIST_TABLES + (MOVIE_RATINGS_VERSION,))
+    ratings_version = versions[-1]
+    etag = make_etag("movies", cache_key, versions)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+
+    # Only the rating sort's order depends on the rating aggregates. Other
+    # pages outlive review writes and just refresh their own movies' ratings
+    cache_version = versions if sort == "rating" else versions[:-1]
+    cached = movie_list_cache.get(cache_key, version=cache_version)
+    if cached is not None:
+        page_ratings_version, page = cached
+        if page_ratings_version != ratings_version:
+            page = await refresh_page_ratings(db, page)
+            movie_list_cache.set(cache_key, (ratings_version, page), version=cache_version)
+        return page
+
+    # Ratings come from the aggregates kept on the movie row, so the
+    # listing never has to group the reviews table
+    query = select(models.Movie)
 
-    # Main query
-    query = (
-        db.query(
-            models.Movie,
-            ratings_subquery.c.average_rating,
-            ratings_subquery.c.review_count
-        )
-        .outerjoin(ratings_subquery, models.Movie.id == ratings_subquery.c.movie_id)
-    )
-    
     # Apply filters
     if search:
-        query = query.filter(models.Movie.title.ilike(f"%{search}%"))
-    
-    if genre and genre != "All Genres":
-        query = query.join(models.Movie.genres).filter(models.Genre.name == genre)
-    
-    if year and year != "all":
-        try:
-            year_start = int(year)
-            if year == "older":
-                query = query.filter(models.Movie.year < 1970)
-            else:
-                query = query.filter(
-                    models.Movie.year >= year_start,
-                    models.Movie.year < year_start + 10
-                )
-        except ValueError:
-            pass
+        query = query.where(models.Movie.title.ilike(f"%{search}%"))
 
-    results = query.all()
-    
-    return [
-        schemas.MovieResponse(
-            id=movie.Movie.id,
-            title=movie.Movie.title,
-            director=movie.Movie.director,
-            year=movie.Movie.year,
-            genres=[genre.name for genre in movie.Movie.genres],
-            average_rating=round(float(movie.average_rating), 1) if movie.average_rating else None,
-            review_count=movie.review_count or 0
+    if genre:
+        query = query.join(models.Movie.genres).where(models.Genre.name == genre)
+
+    if decade == "older":
+        query = query.where(models.Movie.year < 1970)
+    elif decade is not None:
+        query = query.where(
+            models.Movie.year >= decade,
+            models.Movie.year < decade + 10
         )
-        for movie in results
-    ]
 
-@app.post("/reviews/{review_id}/like")
-def like_review(review_id: int, db: Session = Depends(get_db)):
-    db_review = db.query(Review).filter(Review.id == review_id).first()
-    if not db_review:
+    try:
+        movies, next_cursor = await paginate_movies(db, query, sort, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    genre_names = await load_genre_names(db, [movie.id for movie in movies])
+
+    page = schemas.MoviePage(
+        items=[
+            schemas.MovieResponse(
+                id=movie.id,
+                title=movie.title,
+                director=movie.director,
+                year=movie.year,
+                genres=genre_names[movie.id],
+                **rating_fields(movie.rating_average, movie.review_count)
+            )
+            for movie in movies
+        ],
+        next_cursor=next_cursor
+    )
+    movie_list_cache.set(cache_key, (ratings_version, page), version=cache_version)
+    return page
+
+@router.post("/reviews/{review_id}/like")
+async def like_review(review_id: int, db: AsyncSession = Depends(get_db)):
+    # A primary-key read, no write transaction: the increment is buffered
+    # and written with the others for this review on the next flush
+    if await db.scalar(select(Review.id).where(Review.id == review_id)) is None:
         raise HTTPException(status_code=404, detail="Review not found")
-    db_review.likes += 1
-    db.commit()
-    db.refresh(db_review)
+    review_likes.add(review_id)
     return {"message": "Review liked successfully"}
 
-@app.get("/movies/top/", response_model=List[schemas.Movie])
-def get_top_movies(limit: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
-    query = db.query(Movie)
-    query = query.order_by(Movie.rating_average.desc(), Movie.review_count.desc())
-    return query.limit(limit).all()
+@router.get("/movies/top/", response_model=List[schemas.Movie])
+async def get_top_movies(limit: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(get_db)):
+    # Walks ix_movies_weighted_score_id from the top: O(limit), no sort
+    query = (
+        select(Movie)
+        .where(Movie.review_count > 0)
+        .order_by(Movie.weighted_score.desc(), Movie.id.desc())
+    )
+    movies = (await db.scalars(query.limit(limit))).all()
+    genre_names = await load_genre_names(db, [movie.id for movie in movies])
+    return [movie_summary(movie, genre_names) for movie in movies]
 
-@app.get("/movies/recommended/", response_model=List[schemas.Movie])
-def get_recommended_movies(
+@router.get("/movies/leaderboard/", response_model=List[schemas.Movie])
+async def get_leaderboard(
+    genre: str = "All Genres",
+    year: str = "all",
+    limit: int = Query(10, ge=1, le=LEADERBOARD_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    # Same genre/year parameters as GET /movies/, one board at a time
+    _, genre, decade = normalize_movie_filters("", genre, year)
+    if (genre is None) == (decade is None):
+        raise HTTPException(status_code=400, detail="Pass either a genre or a year")
+    await leaderboards.ensure_fresh()
+    movie_ids = leaderboards.top(genre=genre, decade=decade, limit=limit)
+
+    movies = {movie.id: movie for movie in (await db.scalars(select(Movie).where(Movie.id.in_(movie_ids)))).all()}
+    ranked = [movies[movie_id] for movie_id in movie_ids if movie_id in movies]
+    genre_names = await load_genre_names(db, movie_ids)
+    return [movie_summary(movie, genre_names) for movie in ranked]
+
+@router.get("/movies/trending/", response_model=List[schemas.Movie])
+async def get_trending_movies(limit: int = Query(10, ge=1, le=TRENDING_SIZE), db: AsyncSession = Depends(get_db)):
+    # Most reviewed lately, each review's weight halving every
+    # TRENDING_HALF_LIFE_HOURS
+    await trending.ensure_fresh()
+    movie_ids = [movie_id for movie_id, _ in trending.trending(limit)]
+
+    movies = {movie.id: movie for movie in (await db.scalars(select(Movie).where(Movie.id.in_(movie_ids)))).all()}
+    ranked = [movies[movie_id] for movie_id in movie_ids if movie_id in movies]
+    genre_names = await load_genre_names(db, movie_ids)
+    return [movie_summary(movie, genre_names) for movie in ranked]
+
+@router.get("/movies/recommended/", response_model=List[schemas.Movie])
+async def get_recommended_movies(
     user_id: int,
-    limit: int = 10,
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
 ):
-    # Get user's favorite genres based on their reviews
-    user_reviews = db.query(Review).filter(Review.user_id == user_id).all()
-    user_rated_movies = [review.movie_id for review in user_reviews]
-    
-    # Find similar movies in those genres but not yet rated by the user
-    recommended = db.query(Movie)\
-        .filter(Movie.id.notin_(user_rated_movies))\
-        .order_by(Movie.rating_average.desc())\
-        .limit(limit)\
-        .all()
-    
-    return recommended
-
-@app.get("/debug/db")
-def view_database(db: Session = Depends(get_db)):
+    # The background job keeps each user's list in user_recommendations;
+    # serving it is one primary-key range scan
+    movie_ids = await get_user_recommendations(db, user_id, limit)
+    if not movie_ids:
+        # No list yet: ask the job for one and serve the popular movies of
+        # the user's genres meanwhile
+        async def request_list(session):
+            await request_user_recommendations(session, user_id)
+
+        await write_queue.submit(request_list)
+        await recommender.load_genre_popular(db)
+        rated = (await db.scalars(select(Review.movie_id).where(Review.user_id == user_id))).all()
+        genre_weights = {
+            genre_id: count for _, genre_id, count in (await db.execute(genre_weights_query([user_id]))).all()
+        }
+        movie_ids = recommender.popular_for(genre_weights, rated, limit)
+
+    movies = {movie.id: movie for movie in (await db.scalars(select(Movie).where(Movie.id.in_(movie_ids)))).all()}
+    recommended = [movies[movie_id] for movie_id in movie_ids if movie_id in movies]
+    if len(recommended) < limit:
+        recommended += (await db.scalars(
+            select(Movie)
+            .where(~select(Review.id).where(Review.user_id == user_id, Review.movie_id == Movie.id).exists())
+            .where(Movie.id.notin_(movie_ids))
+            .order_by(Movie.rating_average.desc())
+            .limit(limit - len(recommended))
+        )).all()
+    genre_names = await load_genre_names(db, [movie.id for movie in recommended])
+
+    return [movie_summary(movie, genre_names) for movie in recommended]
+
+@router.get("/debug/stats")
+async def view_stats():
     return {
-        "users": db.query(User).all(),
-        "movies": db.query(Movie).all(),
-        "reviews": db.query(Review).all()
+        "password_hasher": password_hasher.stats(),
+        "principal_cache": principal_cache.stats(),
+        "movie_list_cache": movie_list_cache.stats(),
+        "db_pools": registry.pool_stats(),
+        "recommender": recommender.stats(),
+        "leaderboards": leaderboards.stats(),
+        "trending": trending.stats(),
+        "review_likes": review_likes.stats(),
+        "write_queue": write_queue.stats()
     }
 
-@app.get("/movies/search/", response_model=List[schemas.Movie])
-def search_movies(
+@router.get("/debug/db")
+async def view_database(db: AsyncSession = Depends(get_db)):
+    return {
+        "users": (await db.scalars(select(User))).all(),
+        "movies": (await db.scalars(select(Movie))).all(),
+        "reviews": (await db.scalars(select(Review))).all()
+    }
+
+@router.get("/movies/search/", response_model=List[schemas.Movie])
+async def search_movies(
     query: str,
-    db: Session = Depends(get_db)
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
 ):
-    search = f"%{query}%"
-    return db.query(Movie)\
-        .filter(
-            (Movie.title.ilike(search)) |
-            (Movie.director.ilike(search)) |
-            (Movie.synopsis.ilike(search))
-        ).all()
-
-@app.post("/init-sample-data/")
-def initialize_sample_data(db: Session = Depends(get_db)):
-    return init_db(db)
-
-@app.post("/register", status_code=status.HTTP_201_CREATED)
-async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    # Ranked by bm25 in the FTS index, so keep that order when loading rows
+    movie_ids = await search_movie_ids(db, query, limit)
+    if not movie_ids:
+        return []
+    movies = (await db.scalars(select(Movie).where(Movie.id.in_(movie_ids)))).all()
+    movies_by_id = {movie.id: movie for movie in movies}
+    genre_names = await load_genre_names(db, movie_ids)
+
+    return [
+        movie_summary(movies_by_id[movie_id], genre_names)
+        for movie_id in movie_ids
+        if movie_id in movies_by_id
+    ]
+
+@router.post("/init-sample-data/")
+async def initialize_sample_data(db: AsyncSession = Depends(get_db)):
+    return await db.run_sync(init_sample_data)
+
+@router.post("/register", status_code=status.HTTP_201_CREATED)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     # Debug print
     print(f"Attempting to register user with email: {user.email}")
-    
+
     # Check if user already exists
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+    db_user = await db.scalar(select(models.User).where(models.User.email == user.email))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    
+
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     db_user = models.User(
         email=user.email,
+        username=user.username,
         hashed_password=hashed_password
     )
-    
+
+    async def insert_user(session):
+        session.add(db_user)
+        await session.flush()
+
     try:
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await write_queue.submit(insert_user)
         print(f"Successfully registered user: {user.email}")
         return {"email": user.email}
     except Exception as e:
         print(f"Error registering user: {str(e)}")
-        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error creating user"
         )
 
-@app.post("/token")
+@router.post("/token")
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=401,
@@ -312,99 +501,136 @@ async def login(
     access_token = create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
-@app.get("/my-profile", response_model=schemas.UserProfile)
-async def get_user_profile(current_user: User = Depends(get_current_user)):
+@router.get("/my-profile", response_model=schemas.UserProfile)
+async def get_user_profile(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    reviews_count = await db.scalar(
+        select(func.count(Review.id)).where(Review.user_id == current_user.id)
+    )
+    watchlist_count = await db.scalar(
+        select(func.count(Watchlist.id)).where(Watchlist.user_id == current_user.id)
+    )
     return {
+        "id": current_user.id,
         "username": current_user.username,
         "email": current_user.email,
-        "reviews_count": len(current_user.reviews),
-        "watchlist_count": len(current_user.watchlist)
+        "reviews_count": reviews_count,
+        "watchlist_count": watchlist_count
     }
 
-@app.get("/my-reviews", response_model=List[schemas.ReviewWithMovie])
-def get_user_reviews(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def reviews_with_movies(db: AsyncSession, user_id: int, username: str):
+    rows = (await db.execute(
+        select(models.Review, models.Movie)
+        .join(models.Movie, models.Review.movie_id == models.Movie.id)
+        .where(models.Review.user_id == user_id)
+        .order_by(models.Review.created_at.desc())
+    )).all()
+    genre_names = await load_genre_names(db, [movie.id for _, movie in rows])
+    return [
+        {
+            "id": review.id,
+            "rating": review.rating,
+            "comment": review.comment,
+            "created_at": review.created_at,
+            "user_id": review.user_id,
+            "movie_id": review.movie_id,
+            "user_username": username,
+            "movie": movie_summary(movie, genre_names)
+        }
+        for review, movie in rows
+    ]
+
+@router.get("/my-reviews", response_model=List[schemas.ReviewWithMovie])
+async def get_user_reviews(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    reviews = db.query(models.Review).filter(
-        models.Review.user_id == current_user.id
-    ).all()
-    return reviews
-
-@app.get("/my-watched", response_model=List[schemas.Movie])
-def get_watched_movies(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    return await reviews_with_movies(db, current_user.id, current_user.username)
+
+@router.get("/my-watched", response_model=List[schemas.Movie])
+async def get_watched_movies(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     # Get movies that the user has reviewed
-    watched_movies = db.query(models.Movie).join(
-        models.Review
-    ).filter(
-        models.Review.user_id == current_user.id
-    ).distinct().all()
-    return watched_movies
-
-@app.get("/my-watchlist", response_model=List[schemas.Movie])
-async def get_user_watchlist(current_user: User = Depends(get_current_user)):
-    return [item.movie for item in current_user.watchlist]
-
-@app.post("/watchlist/{movie_id}")
+    watched_movies = (await db.scalars(
+        select(models.Movie)
+        .join(models.Review)
+        .where(models.Review.user_id == current_user.id)
+        .distinct()
+    )).all()
+    genre_names = await load_genre_names(db, [movie.id for movie in watched_movies])
+    return [movie_summary(movie, genre_names) for movie in watched_movies]
+
+@router.get("/my-watchlist", response_model=List[schemas.Movie])
+async def get_user_watchlist(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    movies = (await db.scalars(
+        select(models.Movie)
+        .join(Watchlist, Watchlist.movie_id == models.Movie.id)
+        .where(Watchlist.user_id == current_user.id)
+    )).all()
+    genre_names = await load_genre_names(db, [movie.id for movie in movies])
+    return [movie_summary(movie, genre_names) for movie in movies]
+
+@router.post("/watchlist/{movie_id}")
 async def add_to_watchlist(
     movie_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
-    watchlist_item = Watchlist(user_id=current_user.id, movie_id=movie_id)
-    db.add(watchlist_item)
-    db.commit()
+    async def insert_entry(session):
+        # Adding a movie twice is a no-op rather than a unique-index violation
+        await session.execute(
+            sqlite_insert(Watchlist)
+            .values(user_id=current_user.id, movie_id=movie_id)
+            .on_conflict_do_nothing(index_elements=["user_id", "movie_id"])
+        )
+
+    await write_queue.submit(insert_entry)
     return {"message": "Added to watchlist"}
 
-@app.get("/genres/", response_model=List[Genre])
-def get_genres(db: Session = Depends(get_db)):
-    genres = db.query(models.Genre).all()
-    return [{"id": genre.id, "name": genre.name} for genre in genres]
+@router.get("/genres/", response_model=List[Genre])
+async def get_genres(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    etag = make_etag("genres", await get_table_versions(db, ("genres",)))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
 
-@app.on_event("startup")
-async def startup_event():
-    # Create a new database session
-    db = next(get_db())
-    # Initialize the database with seed data
-    seed_data(db)
-    # Close the session
-    db.close()
+    genres = (await db.scalars(select(models.Genre))).all()
+    return [{"id": genre.id, "name": genre.name} for genre in genres]
 
 # Add this new endpoint to serve the your_movies page
-@app.get("/your-movies")
+@router.get("/your-movies")
 async def your_movies_page(request: Request):
     return templates.TemplateResponse("your_movies.html", {"request": request})
 
 # Add this API endpoint to get user reviews
-@app.get("/api/user/reviews", response_model=List[schemas.ReviewWithMovie])
+@router.get("/api/user/reviews", response_model=List[schemas.ReviewWithMovie])
 async def get_user_reviews(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    reviews = db.query(models.Review).filter(
-        models.Review.user_id == current_user.id
-    ).all()
-    return reviews
-
-@app.get("/movie/{movie_id}")
-async def get_movie(movie_id: int, request: Request, db: Session = Depends(get_db)):
-    movie = db.query(models.Movie).filter(models.Movie.id == movie_id).first()
+    return await reviews_with_movies(db, current_user.id, current_user.username)
+
+@router.get("/movie/{movie_id}")
+async def get_movie(movie_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    movie = await db.get(models.Movie, movie_id)
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
-    
+
     # Calculate average rating
-    rating_stats = (
-        db.query(
+    rating_stats = (await db.execute(
+        select(
             func.avg(models.Review.rating).label('average_rating'),
             func.count(models.Review.id).label('review_count')
         )
-        .filter(models.Review.movie_id == movie_id)
-        .first()
-    )
-    
+        .where(models.Review.movie_id == movie_id)
+    )).first()
+
     return templates.TemplateResponse(
         "movie_details.html",
         {
@@ -415,29 +641,48 @@ async def get_movie(movie_id: int, request: Request, db: Session = Depends(get_d
         }
     )
 
-@app.get("/api/movies/{movie_id}", response_model=schemas.MovieResponse)
-def get_movie_details(movie_id: int, db: Session = Depends(get_db)):
-    movie = db.query(models.Movie).filter(models.Movie.id == movie_id).first()
+@router.get("/api/movies/{movie_id}", response_model=schemas.MovieResponse)
+async def get_movie_details(movie_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    etag = make_etag("movie", movie_id, await get_table_versions(db, MOVIE_LIST_TABLES))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+
+    movie = await db.get(models.Movie, movie_id)
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
-    
-    return {
-        "id": movie.id,
-        "title": movie.title,
-        "director": movie.director,
-        "year": movie.year,
-        "genres": [genre.name for genre in movie.genres]  # Convert Genre objects to strings
-    }
+    genre_names = await load_genre_names(db, [movie.id])
+
+    return movie_summary(movie, genre_names)
 
-@app.get("/api/movies/{movie_id}/reviews", response_model=List[schemas.ReviewResponse])
-def get_movie_reviews(movie_id: int, db: Session = Depends(get_db)):
-    reviews = (
-        db.query(models.Review)
+@router.get("/api/movies/{movie_id}/reviews", response_model=List[schemas.ReviewResponse])
+async def get_movie_reviews(
+    movie_id: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(REVIEW_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    # The next page is ?before=<id of the last review on this one>; walks
+    # ix_reviews_movie_id_id backwards, so a page costs O(limit) however
+    # many reviews the movie has
+    etag = make_etag("movie_reviews", movie_id, limit, before, await get_table_versions(db, ("reviews", "users")))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+
+    query = (
+        select(models.Review, models.User.username)
         .join(models.User)  # Join with User table
-        .filter(models.Review.movie_id == movie_id)
-        .all()
+        .where(models.Review.movie_id == movie_id)
+        .order_by(models.Review.id.desc())
+        .limit(limit)
     )
-    
+    if before is not None:
+        query = query.where(models.Review.id < before)
+    reviews = (await db.execute(query)).all()
+
     return [
         {
             "id": review.id,
@@ -446,17 +691,17 @@ def get_movie_reviews(movie_id: int, db: Session = Depends(get_db)):
             "created_at": review.created_at,
             "user_id": review.user_id,
             "movie_id": review.movie_id,
-            "user_username": review.user.username
+            "user_username": username,
+            "likes": review.likes
         }
-        for review in reviews
+        for review, username in reviews
     ]
 
-@app.post("/api/movies/{movie_id}/reviews", response_model=schemas.ReviewResponse)
-def create_review(
+@router.post("/api/movies/{movie_id}/reviews", response_model=schemas.ReviewResponse)
+async def create_review(
     movie_id: int,
     review: schemas.ReviewCreate,
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     db_review = models.Review(
         rating=review.rating,
@@ -464,11 +709,15 @@ def create_review(
         movie_id=movie_id,
         user_id=current_user.id
     )
-    
-    db.add(db_review)
-    db.commit()
-    db.refresh(db_review)
-    
+
+    async def insert_review(session):
+        if (await record_rating(session, movie_id, review.rating)).rowcount == 0:
+            raise HTTPException(status_code=404, detail="Movie not found")
+        session.add(db_review)
+        await session.flush()
+
+    await write_queue.submit(insert_review)
+
     # Create response with username
     return {
         "id": db_review.id,
@@ -480,45 +729,52 @@ def create_review(
         "user_username": current_user.username  # Add the username
     }
 
-@app.get("/your-movies/list", response_model=List[schemas.MovieResponse])
+@router.get("/your-movies/list", response_model=List[schemas.MovieResponse])
 async def get_your_movies(
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    user_reviews = db.query(models.Review).filter(models.Review.user_id == current_user.id).all()
+    # One query for the reviewed movies and one for all of their genres
+    user_reviews = (await db.execute(
+        select(models.Review.rating, models.Movie)
+        .join(models.Movie, models.Review.movie_id == models.Movie.id)
+        .where(models.Review.user_id == current_user.id)
+    )).all()
+    genre_names = await load_genre_names(db, [movie.id for _, movie in user_reviews])
     movies = []
-    for review in user_reviews:
-        movie = review.movie
+    for rating, movie in user_reviews:
         movie_response = schemas.MovieResponse(
             id=movie.id,
             title=movie.title,
             director=movie.director,
             year=movie.year,
-            genres=[genre.name for genre in movie.genres],
-            your_rating=review.rating
+            genres=genre_names[movie.id],
+            your_rating=rating
         )
         movies.append(movie_response)
     return movies
 
-@app.get("/login")
+@router.get("/login")
 async def login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
-@app.get("/users", response_class=HTMLResponse)
+@router.get("/users", response_class=HTMLResponse)
 async def get_users_page(request: Request):
     return templates.TemplateResponse("users.html", {"request": request})
 
-@app.get("/api/users", response_model=List[schemas.UserWithStats])
-async def get_users(db: Session = Depends(get_db)):
-    users = db.query(
-        models.User,
-        func.count(models.Review.id).label('review_count')
-    ).outerjoin(
-        models.Review
-    ).group_by(
-        models.User.id
-    ).all()
-    
+@router.get("/api/users", response_model=List[schemas.UserWithStats])
+async def get_users(db: AsyncSession = Depends(get_db)):
+    users = (await db.execute(
+        select(
+            models.User,
+            func.count(models.Review.id).label('review_count')
+        ).outerjoin(
+            models.Review
+        ).group_by(
+            models.User.id
+        )
+    )).all()
+
     return [
         schemas.UserWithStats(
             id=user.User.id,
@@ -529,3 +785,50 @@ async def get_users(db: Session = Depends(get_db)):
         for user in users
     ]
 
+def create_app(started: float = None) -> FastAPI:
+    # No database or filesystem writes here; `python -m app.bootstrap`
+    # creates the schema, seeds it and builds the static assets
+    started = time.perf_counter() if started is None else started
+    app = FastAPI(title="Movie Rating System")
+
+    # Compress dynamic responses for clients that accept br/gzip
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    # Mount static files. The content-hashed, precompressed build output is
+    # served from /static/dist with immutable caching.
+    app.mount("/static/dist", PrecompressedStaticFiles(directory=DIST_DIR, check_dir=False), name="static-dist")
+    app.mount("/static", StaticFiles(directory="app/static"), name="static")
+    templates.env.globals["static_url"] = make_static_url(load_manifest())
+
+    app.add_exception_handler(PasswordHasherOverloaded, password_hasher_overloaded)
+    app.add_exception_handler(PoolTimeoutError, database_pool_exhausted)
+    app.include_router(router)
+
+    # Time until the server calls the startup hook is the server's, not ours
+    app.state.created_ms = (time.perf_counter() - started) * 1000
+
+    @app.on_event("startup")
+    async def startup_event():
+        hook_started = time.perf_counter()
+        await check_database_ready()
+        if RECOMMENDATION_JOB_ENABLED:
+            app.state.recommendation_job = asyncio.create_task(recommender.run_forever())
+        app.state.counter_flush = asyncio.create_task(review_likes.run_forever())
+        app.state.startup_ms = app.state.created_ms + (time.perf_counter() - hook_started) * 1000
+        check_startup_budget(app.state.startup_ms)
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        for name in ("recommendation_job", "counter_flush"):
+            job = getattr(app.state, name, None)
+            if job is not None:
+                job.cancel()
+        # Write the likes still buffered, then whatever is queued
+        await review_likes.flush()
+        await write_queue.close()
+        # The next start only has to read the reviews written after this
+        await asyncio.to_thread(trending.save_snapshot)
+
+    return app
+
+app = create_app(IMPORT_STARTED)
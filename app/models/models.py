@@ -1,14 +1,30 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Table, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Table, DateTime, Index, PrimaryKeyConstraint, func, select
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
-# Association table for Movie-Genre many-to-many relationship
+# Association table for Movie-Genre many-to-many relationship. The primary
+# key clusters rows by genre for genre filters; the reverse index serves
+# genre-name loading for a page of movies. Both cover the whole row.
 movie_genre = Table(
     'movie_genre',
     Base.metadata,
-    Column('movie_id', Integer, ForeignKey('movies.id')),
-    Column('genre_id', Integer, ForeignKey('genres.id'))
+    Column('movie_id', Integer, ForeignKey('movies.id'), nullable=False),
+    Column('genre_id', Integer, ForeignKey('genres.id'), nullable=False),
+    PrimaryKeyConstraint('genre_id', 'movie_id'),
+    Index('ix_movie_genre_movie_id_genre_id', 'movie_id', 'genre_id'),
+    sqlite_with_rowid=False
+)
+
+# Prior of the Bayesian weighted rating (one row): the mean rating over all
+# reviews and how many "votes" of it every movie starts with. Refreshed by
+# rebuild_rating_aggregates and refresh_rating_prior.
+rating_prior = Table(
+    'rating_prior',
+    Base.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('mean', Float, nullable=False),
+    Column('votes', Float, nullable=False)
 )
 
 class User(Base):
@@ -20,12 +36,19 @@ class User(Base):
     hashed_password = Column(String)
     bio = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Only set on users a bulk import created ("ml_<external id>"), so an
+    # import never takes over an account someone registered
+    import_key = Column(String, nullable=True)
 
     # Remove the movies relationship if you don't need users to own movies
     # movies = relationship("Movie", back_populates="user")
     reviews = relationship("Review", back_populates="user")
     watchlist = relationship("Watchlist", back_populates="user")
 
+    __table_args__ = (
+        Index("ux_users_import_key", "import_key", unique=True),
+    )
+
 class Genre(Base):
     __tablename__ = "genres"
 
@@ -42,13 +65,29 @@ class Movie(Base):
     director = Column(String)
     year = Column(Integer)
     synopsis = Column(String)
+    rating_sum = Column(Float, default=0.0)
     rating_average = Column(Float, default=0.0)
     review_count = Column(Integer, default=0)
+    # (rating_sum + votes * mean) / (review_count + votes), see rating_prior;
+    # a new movie has no reviews, so it starts at the mean
+    weighted_score = Column(
+        Float, nullable=True,
+        default=select(func.coalesce(func.max(rating_prior.c.mean), 0.0)).scalar_subquery()
+    )
 
     reviews = relationship("Review", back_populates="movie")
     genres = relationship("Genre", secondary=movie_genre, back_populates="movies")
     watchlist_entries = relationship("Watchlist", back_populates="movie")
 
+    # Keyset pagination orders by (column, id); title uses ix_movies_title,
+    # which SQLite already keys by (title, rowid). The weighted score index
+    # serves the /movies/top/ leaderboard.
+    __table_args__ = (
+        Index("ix_movies_year_id", "year", "id"),
+        Index("ix_movies_rating_average_id", "rating_average", "id"),
+        Index("ix_movies_weighted_score_id", "weighted_score", "id"),
+    )
+
 class Review(Base):
     __tablename__ = "reviews"
 
@@ -58,10 +97,20 @@ class Review(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     user_id = Column(Integer, ForeignKey("users.id"))
     movie_id = Column(Integer, ForeignKey("movies.id"))
+    # Written in batches by app.counters.review_likes
+    likes = Column(Integer, nullable=False, default=0, server_default="0")
 
     user = relationship("User", back_populates="reviews")
     movie = relationship("Movie", back_populates="reviews")
 
+    # Per-movie rating stats and review pages (newest first), and per-user
+    # dashboards newest first
+    __table_args__ = (
+        Index("ix_reviews_movie_id_rating", "movie_id", "rating"),
+        Index("ix_reviews_movie_id_id", "movie_id", "id"),
+        Index("ix_reviews_user_id_created_at", "user_id", "created_at"),
+    )
+
 class Watchlist(Base):
     __tablename__ = "watchlists"
 
@@ -70,4 +119,32 @@ class Watchlist(Base):
     movie_id = Column(Integer, ForeignKey("movies.id"))
 
     user = relationship("User", back_populates="watchlist")
-    movie = relationship("Movie", back_populates="watchlist_entries") 
\ No newline at end of file
+    movie = relationship("Movie", back_populates="watchlist_entries")
+
+    __table_args__ = (
+        Index("ux_watchlists_user_id_movie_id", "user_id", "movie_id", unique=True),
+    )
+
+# Precomputed recommendation lists, one row per (user, rank), filled by the
+# background job in app.recommender and read back with a single range scan
+class UserRecommendation(Base):
+    __tablename__ = "user_recommendations"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    movie_id = Column(Integer, ForeignKey("movies.id"), nullable=False)
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
+class UserRecommendationState(Base):
+    __tablename__ = "user_recommendation_state"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    stale = Column(Integer, nullable=False, default=1)
+    active_at = Column(String, nullable=False)
+    computed_at = Column(String, nullable=True)
+
+    # The job takes stale users, most recently active first
+    __table_args__ = (
+        Index("ix_user_recommendation_state_stale_active_at", "stale", "active_at"),
+    )
@@ -0,0 +1,158 @@
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import engine
+from app.database.recommendations import genre_weights_query, load_genre_popularity, pick_users, save_user_recommendations
+from app.models.models import Review
+
+# Recommendations from the item-item similarity index in app.similarity.
+#
+# numpy and scipy are only imported when the index is first used, i.e. by
+# the background job, so importing the app doesn't pay for them.
+#
+# Requests don't score anything: a background job writes each
+# user's list to user_recommendations, taking users whose list went stale
+# (they reviewed something, or asked for a list they don't have) most
+# recently active first, and the endpoint reads it back. Users without a
+# list get per-genre popularity lists, which every worker loads itself.
+
+RECOMMENDER_REFRESH_SECONDS = float(os.getenv("RECOMMENDER_REFRESH_SECONDS", "30"))
+
+# Precomputed lists (see app.database.recommendations)
+RECOMMENDATION_LIST_SIZE = int(os.getenv("RECOMMENDATION_LIST_SIZE", "50"))
+RECOMMENDATION_BATCH_SIZE = int(os.getenv("RECOMMENDATION_BATCH_SIZE", "200"))
+RECOMMENDATION_JOB_SECONDS = float(os.getenv("RECOMMENDATION_JOB_SECONDS", "5"))
+RECOMMENDATION_MAX_AGE_HOURS = float(os.getenv("RECOMMENDATION_MAX_AGE_HOURS", "24"))
+GENRE_POPULARITY_SECONDS = 60
+# Every worker can run the job (writes are idempotent), but one is enough
+RECOMMENDATION_JOB_ENABLED = os.getenv("RECOMMENDATION_JOB_ENABLED", "1") == "1"
+
+
+class Recommender:
+    # Owns the similarity index and the background job that keeps the
+    # precomputed lists in user_recommendations up to date. Index refreshes
+    # and list computation share one thread, so they never overlap.
+    def __init__(self, engine: Engine, refresh_seconds: float = RECOMMENDER_REFRESH_SECONDS):
+        self.engine = engine
+        self.refresh_seconds = refresh_seconds
+        self._index = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recommender")
+        self.genre_popular = {}
+        self._genre_popular_at = 0.0
+        self.lists_computed = 0
+        self.passes = 0
+
+    @property
+    def index(self):
+        if self._index is None:
+            from app.similarity import ItemSimilarityIndex
+
+            self._index = ItemSimilarityIndex()
+        return self._index
+
+    def _refresh_index(self):
+        refreshed_at = self.index.refreshed_at
+        if refreshed_at is None or time.time() - refreshed_at >= self.refresh_seconds:
+            self.index.refresh(self.engine)
+
+    def _refresh_genre_popular(self):
+        if time.time() - self._genre_popular_at < GENRE_POPULARITY_SECONDS:
+            return
+        with self.engine.connect() as conn:
+            self.genre_popular = load_genre_popularity(conn, RECOMMENDATION_LIST_SIZE)
+        self._genre_popular_at = time.time()
+
+    async def load_genre_popular(self, db: AsyncSession):
+        # The same refresh for request handlers, on the request's connection,
+        # so workers that don't run the job have cold-start lists too
+        if time.time() - self._genre_popular_at < GENRE_POPULARITY_SECONDS:
+            return
+        conn = await db.connection()
+        self.genre_popular = await conn.run_sync(load_genre_popularity, RECOMMENDATION_LIST_SIZE)
+        self._genre_popular_at = time.time()
+
+    def run_once(self) -> int:
+        # One pass of the job: returns how many lists were written
+        self._refresh_genre_popular()
+        self._refresh_index()
+        with self.engine.connect() as conn:
+            picked = pick_users(conn, RECOMMENDATION_BATCH_SIZE, RECOMMENDATION_MAX_AGE_HOURS)
+            if not picked:
+                return 0
+            rows = conn.execute(
+                select(Review.user_id, Review.movie_id, Review.rating).where(Review.user_id.in_(list(picked)))
+            ).all()
+            user_ratings = {user_id: {} for user_id in picked}
+            for user_id, movie_id, rating in rows:
+                user_ratings[user_id][movie_id] = rating
+            genre_weights = {user_id: {} for user_id in picked}
+            for user_id, genre_id, count in conn.execute(genre_weights_query(list(picked))):
+                genre_weights[user_id][genre_id] = count
+
+            lists = {}
+            for user_id, ratings in user_ratings.items():
+                movie_ids = self.index.recommend(ratings, RECOMMENDATION_LIST_SIZE)
+                # Users the index knows little about are topped up from
+                # their genres' popular movies
+                if len(movie_ids) < RECOMMENDATION_LIST_SIZE:
+                    movie_ids += self.popular_for(
+                        genre_weights[user_id], set(ratings) | set(movie_ids),
+                        RECOMMENDATION_LIST_SIZE - len(movie_ids)
+                    )
+                lists[user_id] = movie_ids
+            save_user_recommendations(conn, lists, picked)
+            conn.commit()
+        self.lists_computed += len(lists)
+        self.passes += 1
+        return len(lists)
+
+    async def run_forever(self, interval: float = RECOMMENDATION_JOB_SECONDS):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                written = await loop.run_in_executor(self._executor, self.run_once)
+            except Exception as exc:
+                print(f"Recommendation job failed: {exc!r}")
+                written = 0
+            # Keep going straight away while there is a backlog
+            if written < RECOMMENDATION_BATCH_SIZE:
+                await asyncio.sleep(interval)
+
+    def popular_for(self, genre_weights: dict, exclude, limit: int) -> list:
+        # Cold-start list: the most popular movies of the user's genres,
+        # interleaved in proportion to how often they rated each genre
+        # (all genres equally when they haven't rated anything)
+        popular = self.genre_popular
+        genres = [genre_id for genre_id in genre_weights if genre_id in popular] or list(popular)
+        if not genres:
+            return []
+        weights = [genre_weights.get(genre_id, 1) for genre_id in genres]
+        total = sum(weights)
+        quotas = [max(1, math.ceil(weight / total * limit)) for weight in weights]
+        chosen, seen = [], set(exclude)
+        for genre_id, quota in sorted(zip(genres, quotas), key=lambda pair: -pair[1]):
+            taken = 0
+            for movie_id in popular[genre_id]:
+                if taken >= quota:
+                    break
+                if movie_id not in seen:
+                    seen.add(movie_id)
+                    chosen.append(movie_id)
+                    taken += 1
+        return chosen[:limit]
+
+    def stats(self) -> dict:
+        return {
+            "index": self._index.stats() if self._index is not None else {"ready": False},
+            "lists_computed": self.lists_computed,
+            "passes": self.passes,
+            "popular_genres": len(self.genre_popular),
+        }
+
+
+recommender = Recommender(engine)
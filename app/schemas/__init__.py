@@ -5,6 +5,7 @@ from .schemas import (
     MovieCreate,
     Movie,
     MovieResponse,
+    MoviePage,
     MovieWithReviews,
     ReviewBase,
     ReviewCreate,
@@ -32,6 +33,7 @@ __all__ = [
     "MovieCreate",
     "Movie",
     "MovieResponse",
+    "MoviePage",
     "MovieWithReviews",
     "ReviewBase",
     "ReviewCreate",
@@ -21,12 +21,17 @@ class GenreEnum(str, Enum):
 # Movie schemas first
 class MovieBase(BaseModel):
     title: str
-    director: str
-    year: int
+    # Catalog imports can leave these empty
+    director: Optional[str] = None
+    year: Optional[int] = None
     genres: List[str]
 
-class MovieCreate(MovieBase):
-    pass
+class MovieCreate(BaseModel):
+    title: str
+    director: str
+    year: int
+    synopsis: Optional[str] = None
+    genre_ids: List[int] = []
 
 class MovieSchema(MovieBase):
     id: int
@@ -50,6 +55,10 @@ class MovieResponse(MovieBase):
     class Config:
         from_attributes = True
 
+class MoviePage(BaseModel):
+    items: List[MovieResponse]
+    next_cursor: Optional[str] = None
+
 # Review schemas after Movie schemas
 class ReviewBase(BaseModel):
     rating: int
@@ -71,11 +80,13 @@ class Review(ReviewBase):
 class ReviewResponse(BaseModel):
     id: int
     rating: int
-    comment: str
+    # Imported and generated ratings come without one
+    comment: Optional[str] = None
     created_at: datetime
     user_id: int
     movie_id: int
     user_username: str
+    likes: int = 0
 
     class Config:
         from_attributes = True
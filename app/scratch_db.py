@@ -0,0 +1,38 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from sqlalchemy.engine import make_url
+
+# Checks that write to the database run against a throwaway copy of the
+# configured one, brought up to the current schema (FTS index included).
+# The app reads DATABASE_URL when app.database is first imported, so
+# enter scratch_database() before importing anything else from the app.
+
+
+@contextmanager
+def scratch_database():
+    source = make_url(os.getenv("DATABASE_URL", "sqlite:///movies.db")).database
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "scratch.db"
+        source_conn, scratch_conn = sqlite3.connect(source), sqlite3.connect(path)
+        try:
+            source_conn.backup(scratch_conn)
+        finally:
+            source_conn.close()
+            scratch_conn.close()
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        # No background jobs or snapshot files for a copy
+        os.environ["RECOMMENDATION_JOB_ENABLED"] = "0"
+        os.environ["TRENDING_SNAPSHOT_PATH"] = ""
+        from app.database import async_engine, engine
+        from app.database.init_db import init_db
+
+        init_db()
+        try:
+            yield path
+        finally:
+            engine.dispose()
+            asyncio.run(async_engine.dispose())
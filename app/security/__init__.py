@@ -6,3 +6,4 @@ from .utils import (
     SECRET_KEY,
     ALGORITHM
 )
+from .hashing import password_hasher, PasswordHasherOverloaded
@@ -3,7 +3,9 @@ from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from typing import Optional
 from app.models import User
-from sqlalchemy.orm import Session
+from app.security.hashing import password_hasher
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -18,11 +20,11 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(User).filter(User.email == email).first()
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    user = await db.scalar(select(User).where(User.email == email))
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return False
     return user
 
@@ -0,0 +1,268 @@
+import os
+import threading
+import time
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from app.models.models import Review
+
+# Item-item collaborative filtering.
+#
+# Ratings are loaded into a sparse user x movie matrix and centred on each
+# user's mean, so "liked it more than usual" counts as positive whatever
+# scale a user rates on. Movie similarity is the cosine between columns,
+# computed as blocks of R^T R, and only the top K neighbours of each movie
+# are kept (as fixed-width arrays, so one movie's list can be replaced
+# without touching the others).
+#
+# Scoring a user is a sparse product of their centred ratings with the
+# neighbour rows of the movies they rated, i.e. O(rated * K) per request.
+#
+# Refreshes are incremental: reviews are only ever inserted, so everything
+# with an id above the last one seen belongs to a user whose row changed.
+# Only the movies those users rated get new neighbour lists, and the other
+# movies' lists are patched with the new similarities. Builds and
+# refreshes run on the recommender's background thread (app.recommender);
+# requests never wait for them.
+
+RECOMMENDER_NEIGHBORS = int(os.getenv("RECOMMENDER_NEIGHBORS", "50"))
+# Above this share of changed users a full build is cheaper than patching
+FULL_REBUILD_RATIO = 0.2
+SIMILARITY_BLOCK = 1024
+
+
+def _user_centered(users, items, ratings, shape):
+    # Duplicate (user, movie) reviews are averaged, then each user's mean
+    # is subtracted from their ratings
+    totals = sparse.csr_matrix((ratings.astype(np.float64), (users, items)), shape=shape)
+    counts = sparse.csr_matrix((np.ones_like(ratings, dtype=np.float64), (users, items)), shape=shape)
+    totals.sum_duplicates()
+    counts.sum_duplicates()
+    values = totals.data / counts.data
+    row_counts = np.diff(totals.indptr)
+    rows = np.repeat(np.arange(shape[0]), row_counts)
+    row_sums = np.bincount(rows, weights=values, minlength=shape[0])
+    means = np.divide(row_sums, row_counts, out=np.zeros(shape[0]), where=row_counts > 0)
+    centered = values - means[rows]
+    return sparse.csr_matrix((centered.astype(np.float32), totals.indices, totals.indptr), shape=shape)
+
+
+def _column_norms(matrix) -> np.ndarray:
+    return np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+
+
+class ItemSimilarityIndex:
+    def __init__(self, neighbors: int = RECOMMENDER_NEIGHBORS):
+        self.neighbors = neighbors
+        self._lock = threading.Lock()
+        self.movie_ids = np.zeros(0, dtype=np.int64)
+        self.movie_index = {}
+        self.user_index = {}
+        self.neighbor_ids = np.zeros((0, neighbors), dtype=np.int32)
+        self.neighbor_sims = np.zeros((0, neighbors), dtype=np.float32)
+        self.last_review_id = 0
+        self.built_at = None
+        self.refreshed_at = None
+        self.build_seconds = 0.0
+        self.refresh_seconds = 0.0
+        self.builds = 0
+        self.refreshes = 0
+        # Raw (user, movie, rating) triples as of last_review_id
+        self._users = np.zeros(0, dtype=np.int32)
+        self._items = np.zeros(0, dtype=np.int32)
+        self._ratings = np.zeros(0, dtype=np.float32)
+
+    @property
+    def ready(self) -> bool:
+        return self.built_at is not None
+
+    def _read_reviews(self, conn, after_id: int = 0, user_ids=None):
+        query = select(Review.id, Review.user_id, Review.movie_id, Review.rating).where(
+            Review.user_id.is_not(None), Review.movie_id.is_not(None), Review.rating.is_not(None)
+        )
+        if user_ids is not None:
+            query = query.where(Review.user_id.in_(user_ids))
+        else:
+            query = query.where(Review.id > after_id)
+        rows = conn.execute(query).all()
+        if not rows:
+            return np.zeros((0, 4), dtype=np.int64)
+        return np.array(rows, dtype=np.int64)
+
+    def _index_of(self, mapping: dict, keys) -> np.ndarray:
+        return np.fromiter((mapping.setdefault(int(key), len(mapping)) for key in keys), dtype=np.int32, count=len(keys))
+
+    def _similarity_rows(self, matrix, norms, items):
+        # Cosine similarity of each movie in `items` with every movie, as
+        # one sparse row per movie, computed a block at a time
+        by_column = matrix.tocsc()
+        for start in range(0, len(items), SIMILARITY_BLOCK):
+            block = items[start:start + SIMILARITY_BLOCK]
+            products = (by_column[:, block].T @ by_column).tocsr()
+            for offset, item in enumerate(block):
+                row = slice(products.indptr[offset], products.indptr[offset + 1])
+                columns = products.indices[row]
+                denominators = norms[item] * norms[columns]
+                similarities = np.divide(
+                    products.data[row], denominators,
+                    out=np.zeros(len(columns), dtype=np.float32), where=denominators > 0
+                )
+                keep = (columns != item) & (similarities > 0)
+                yield item, columns[keep], similarities[keep]
+
+    def _set_neighbors(self, neighbor_ids, neighbor_sims, item, columns, similarities):
+        k = self.neighbors
+        if len(columns) > k:
+            top = np.argpartition(similarities, -k)[-k:]
+            columns, similarities = columns[top], similarities[top]
+        neighbor_ids[item] = -1
+        neighbor_sims[item] = 0
+        neighbor_ids[item, :len(columns)] = columns
+        neighbor_sims[item, :len(columns)] = similarities
+
+    def build(self, engine: Engine):
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            rows = self._read_reviews(conn)
+        movie_index, user_index = {}, {}
+        users = self._index_of(user_index, rows[:, 1])
+        items = self._index_of(movie_index, rows[:, 2])
+        ratings = rows[:, 3].astype(np.float32)
+
+        matrix = _user_centered(users, items, ratings, (len(user_index), len(movie_index)))
+        norms = _column_norms(matrix)
+
+        n_items = len(movie_index)
+        neighbor_ids = np.full((n_items, self.neighbors), -1, dtype=np.int32)
+        neighbor_sims = np.zeros((n_items, self.neighbors), dtype=np.float32)
+        for item, columns, similarities in self._similarity_rows(matrix, norms, np.arange(n_items)):
+            self._set_neighbors(neighbor_ids, neighbor_sims, item, columns, similarities)
+
+        movie_ids = np.zeros(n_items, dtype=np.int64)
+        for movie_id, index in movie_index.items():
+            movie_ids[index] = movie_id
+        with self._lock:
+            self.user_index, self.movie_index, self.movie_ids = user_index, movie_index, movie_ids
+            self.neighbor_ids, self.neighbor_sims = neighbor_ids, neighbor_sims
+            self._users, self._items, self._ratings = users, items, ratings
+            self.last_review_id = int(rows[:, 0].max()) if len(rows) else 0
+            self.built_at = self.refreshed_at = time.time()
+        self.build_seconds = time.perf_counter() - started
+        self.builds += 1
+
+    def refresh(self, engine: Engine):
+        if not self.ready:
+            self.build(engine)
+            return
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            changed = self._read_reviews(conn, after_id=self.last_review_id)
+            changed_users = np.unique(changed[:, 1])
+            full_build = len(changed_users) > FULL_REBUILD_RATIO * max(len(self.user_index), 1)
+            if len(changed) and not full_build:
+                # The changed users' complete histories replace their old rows
+                rows = self._read_reviews(conn, user_ids=changed_users.tolist())
+        if not len(changed):
+            self.refreshed_at = time.time()
+            return
+        if full_build:
+            self.build(engine)
+            return
+
+        movie_index, user_index = dict(self.movie_index), dict(self.user_index)
+        users = self._index_of(user_index, rows[:, 1])
+        items = self._index_of(movie_index, rows[:, 2])
+        keep = ~np.isin(self._users, users)
+        all_users = np.concatenate([self._users[keep], users])
+        all_items = np.concatenate([self._items[keep], items])
+        all_ratings = np.concatenate([self._ratings[keep], rows[:, 3].astype(np.float32)])
+
+        n_items = len(movie_index)
+        neighbor_ids = np.full((n_items, self.neighbors), -1, dtype=np.int32)
+        neighbor_sims = np.zeros((n_items, self.neighbors), dtype=np.float32)
+        previous = len(self.neighbor_ids)
+        neighbor_ids[:previous] = self.neighbor_ids
+        neighbor_sims[:previous] = self.neighbor_sims
+
+        matrix = _user_centered(all_users, all_items, all_ratings, (len(user_index), n_items))
+        norms = _column_norms(matrix)
+
+        # Every movie a changed user rated has a new column in the matrix
+        dirty = np.unique(items)
+        for item, columns, similarities in self._similarity_rows(matrix, norms, dirty):
+            self._set_neighbors(neighbor_ids, neighbor_sims, item, columns, similarities)
+            # Similarity is symmetric: patch the lists of the other movies,
+            # updating this movie's entry or replacing their weakest one
+            slots = neighbor_ids[columns] == item
+            listed = slots.any(axis=1)
+            hits, positions = np.nonzero(slots[listed])
+            neighbor_sims[columns[listed][hits], positions] = similarities[listed][hits]
+            others, others_sims = columns[~listed], similarities[~listed]
+            weakest = np.argmin(neighbor_sims[others], axis=1)
+            better = others_sims > neighbor_sims[others, weakest]
+            neighbor_ids[others[better], weakest[better]] = item
+            neighbor_sims[others[better], weakest[better]] = others_sims[better]
+
+        movie_ids = np.zeros(n_items, dtype=np.int64)
+        movie_ids[:previous] = self.movie_ids
+        for movie_id, index in movie_index.items():
+            if index >= previous:
+                movie_ids[index] = movie_id
+        with self._lock:
+            self.user_index, self.movie_index, self.movie_ids = user_index, movie_index, movie_ids
+            self.neighbor_ids, self.neighbor_sims = neighbor_ids, neighbor_sims
+            self._users, self._items, self._ratings = all_users, all_items, all_ratings
+            self.last_review_id = int(changed[:, 0].max())
+            self.refreshed_at = time.time()
+        self.refresh_seconds = time.perf_counter() - started
+        self.refreshes += 1
+
+    def recommend(self, ratings: dict, limit: int) -> list:
+        # ratings: {movie_id: rating} for one user, read fresh per request.
+        # Returns up to `limit` unrated movie ids, best first.
+        with self._lock:
+            movie_index, movie_ids = self.movie_index, self.movie_ids
+            neighbor_ids, neighbor_sims = self.neighbor_ids, self.neighbor_sims
+        rated = [(movie_index[movie_id], rating) for movie_id, rating in ratings.items() if movie_id in movie_index]
+        if not rated:
+            return []
+
+        items = np.array([item for item, _ in rated], dtype=np.int32)
+        values = np.array([rating for _, rating in rated], dtype=np.float32)
+        weights = values - values.mean() if len(values) > 1 else values - 3.0
+
+        ids = neighbor_ids[items]
+        sims = neighbor_sims[items]
+        present = ids >= 0
+        indptr = np.concatenate([[0], np.cumsum(present.sum(axis=1))])
+        neighbors = sparse.csr_matrix((sims[present], ids[present], indptr), shape=(len(items), len(movie_ids)))
+
+        # Weighted deviation from the user's mean, damped so a movie reached
+        # through one weak neighbour doesn't outrank well-supported ones
+        numerator = neighbors.T @ weights
+        support = abs(neighbors).T @ np.ones(len(items), dtype=np.float32)
+        scores = numerator / (support + 1.0)
+        scores[items] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if not len(candidates):
+            return []
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(scores[candidates], -limit)[-limit:]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return movie_ids[candidates].tolist()
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "movies": len(self.movie_index),
+            "users": len(self.user_index),
+            "ratings": len(self._ratings),
+            "neighbors": self.neighbors,
+            "last_review_id": self.last_review_id,
+            "builds": self.builds,
+            "refreshes": self.refreshes,
+            "build_seconds": round(self.build_seconds, 3),
+            "refresh_seconds": round(self.refresh_seconds, 3),
+            "refreshed_at": self.refreshed_at,
+        }
@@ -9,8 +9,8 @@ let searchTimeout = null;
 let isLoggedIn = false;
 let currentUserEmail = null;
 
-// Fetch and display movies
-async function loadMovies(search = '', genre = 'All Genres', yearFilter = 'all') {
+// Fetch and display movies, one page at a time
+async function loadMovies(search = '', genre = 'All Genres', yearFilter = 'all', cursor = null) {
     try {
         // Create URL with all filter parameters
         const params = new URLSearchParams({
@@ -18,13 +18,16 @@ async function loadMovies(search = '', genre = 'All Genres', yearFilter = 'all')
             genre: genre,
             year: yearFilter
         });
+        if (cursor) params.set('cursor', cursor);
         
         const response = await fetch(`/movies/?${params.toString()}`);
         if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
-        const movies = await response.json();
+        const page = await response.json();
+        const movies = page.items;
         
         const movieList = document.getElementById('movieList');
-        if (movies.length === 0) {
+        if (movies.length === 0 && !cursor) {
+            renderLoadMore(null);
             movieList.innerHTML = `
                 <div class="alert alert-info" role="alert">
                     No movies found matching your filters.
@@ -32,7 +35,7 @@ async function loadMovies(search = '', genre = 'All Genres', yearFilter = 'all')
             return;
         }
 
-        movieList.innerHTML = movies.map(movie => {
+        const cardsHtml = movies.map(movie => {
             // Create rating display
             let ratingDisplay;
             if (movie.review_count === 0) {
@@ -52,12 +55,19 @@ async function loadMovies(search = '', genre = 'All Genres', yearFilter = 'all')
             return `
                 <div class="movie-card" onclick="window.location.href='/movie/${movie.id}'">
                     <h3>${movie.title}</h3>
-                    <p>Director: ${movie.director}</p>
-                    <p>Year: ${movie.year}</p>
+                    <p>Director: ${movie.director ?? 'Unknown'}</p>
+                    <p>Year: ${movie.year ?? 'Unknown'}</p>
                     <p>Genres: ${movie.genres.join(', ')}</p>
                     ${ratingDisplay}
                 </div>`;
         }).join('');
+
+        if (cursor) {
+            movieList.insertAdjacentHTML('beforeend', cardsHtml);
+        } else {
+            movieList.innerHTML = cardsHtml;
+        }
+        renderLoadMore(page.next_cursor, () => loadMovies(search, genre, yearFilter, page.next_cursor));
     } catch (error) {
         console.error('Error loading movies:', error);
         document.getElementById('movieList').innerHTML = 
@@ -65,6 +75,28 @@ async function loadMovies(search = '', genre = 'All Genres', yearFilter = 'all')
     }
 }
 
+// Show a "Load more" button under the grid while there are more pages
+function renderLoadMore(nextCursor, onClick) {
+    let container = document.getElementById('movieListMore');
+    if (!container) {
+        container = document.createElement('div');
+        container.id = 'movieListMore';
+        container.className = 'text-center my-4';
+        document.getElementById('movieList').after(container);
+    }
+    container.innerHTML = '';
+    if (!nextCursor) return;
+
+    const button = document.createElement('button');
+    button.className = 'btn btn-outline-primary';
+    button.textContent = 'Load more';
+    button.addEventListener('click', () => {
+        button.disabled = true;
+        onClick();
+    });
+    container.appendChild(button);
+}
+
 // Display movies in grid
 function displayMovies(movies) {
     const movieList = document.getElementById('movieList');
@@ -78,11 +110,11 @@ function displayMovies(movies) {
             <h3 class="h5 mb-3">${movie.title}</h3>
             <p class="mb-2">
                 <strong>Director:</strong><br>
-                ${movie.director}
+                ${movie.director ?? 'Unknown'}
             </p>
             <p class="mb-2">
                 <strong>Year:</strong><br>
-                ${movie.year}
+                ${movie.year ?? 'Unknown'}
             </p>
             <p class="mb-0">
                 <strong>Genres:</strong><br>
@@ -96,7 +128,7 @@ function displayMovies(movies) {
 async function searchMovies() {
     const searchTerm = document.getElementById('searchInput').value.trim().toLowerCase();
     const response = await fetch('/movies/');
-    const movies = await response.json();
+    const movies = (await response.json()).items;
     
     if (searchTerm === '') {
         displayMovies(movies); // Show all movies if search is empty
@@ -105,7 +137,7 @@ async function searchMovies() {
 
     const filteredMovies = movies.filter(movie => 
         movie.title.toLowerCase().includes(searchTerm) ||
-        movie.director.toLowerCase().includes(searchTerm) ||
+        (movie.director || '').toLowerCase().includes(searchTerm) ||
         movie.synopsis.toLowerCase().includes(searchTerm)
     );
     
@@ -158,7 +190,7 @@ async function filterByGenre(genre) {
     try {
         console.log('Filtering by genre:', genre);
         const response = await fetch(genre ? `/movies/?genre=${genre}` : '/movies/');
-        const movies = await response.json();
+        const movies = (await response.json()).items;
         console.log('Filtered movies:', movies);
         displayMovies(movies);
     } catch (error) {
@@ -1,5 +1,7 @@
 // Get movie ID from URL
 const movieId = window.location.pathname.split('/').pop();
+// Reviews per request; the API serves them newest first
+const REVIEW_PAGE_SIZE = 50;
 
 document.addEventListener('DOMContentLoaded', function() {
     loadMovieDetails();
@@ -88,12 +90,15 @@ async function loadMovieDetails() {
     }
 }
 
-async function loadReviews() {
+// Loads the newest reviews, or the ones older than review id `before`
+async function loadReviews(before) {
     const movieId = window.location.pathname.split('/').pop();
     const token = localStorage.getItem('token');
+    const params = new URLSearchParams({ limit: REVIEW_PAGE_SIZE });
+    if (before) params.set('before', before);
     
     try {
-        const response = await fetch(`/api/movies/${movieId}/reviews`, {
+        const response = await fetch(`/api/movies/${movieId}/reviews?${params}`, {
             headers: {
                 'Authorization': `Bearer ${token}`
             }
@@ -102,7 +107,7 @@ async function loadReviews() {
         if (!response.ok) throw new Error('Failed to load reviews');
         
         const reviews = await response.json();
-        displayReviews(reviews);
+        displayReviews(reviews, Boolean(before));
     } catch (error) {
         console.error('Error loading reviews:', error);
     }
@@ -113,14 +118,15 @@ function displayMovieDetails(movie) {
     console.log('Movie details:', movie);
 }
 
-function displayReviews(reviews) {
+function displayReviews(reviews, append) {
     const reviewsContainer = document.getElementById('reviews');
-    if (!reviews.length) {
+    document.getElementById('reviewsMore')?.remove();
+    if (!reviews.length && !append) {
         reviewsContainer.innerHTML = '<p>No reviews yet</p>';
         return;
     }
 
-    reviewsContainer.innerHTML = reviews.map(review => `
+    const reviewsHtml = reviews.map(review => `
         <div class="review-card mb-3">
             <div class="card">
                 <div class="card-body">
@@ -135,4 +141,23 @@ function displayReviews(reviews) {
             </div>
         </div>
     `).join('');
-} 
\ No newline at end of file
+
+    if (append) {
+        reviewsContainer.insertAdjacentHTML('beforeend', reviewsHtml);
+    } else {
+        reviewsContainer.innerHTML = reviewsHtml;
+    }
+
+    // A full page means there may be older reviews
+    if (reviews.length === REVIEW_PAGE_SIZE) {
+        const button = document.createElement('button');
+        button.id = 'reviewsMore';
+        button.className = 'btn btn-outline-primary';
+        button.textContent = 'Load more';
+        button.addEventListener('click', () => {
+            button.disabled = true;
+            loadReviews(reviews[reviews.length - 1].id);
+        });
+        reviewsContainer.after(button);
+    }
+}
\ No newline at end of file
@@ -0,0 +1,107 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from pathlib import Path
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from app.compression import SUPPORTED_ENCODINGS, brotli, negotiate_encoding
+
+# Build step for the files under app/static: every asset is copied to
+# app/static/dist under a content-hashed name (js/main.3f9a1c2b7d4e.js)
+# next to .gz and .br variants compressed at the highest levels. Because a
+# hashed name never changes content, those files are served with a
+# one-year immutable Cache-Control and no request ever compresses them.
+STATIC_DIR = Path("app/static")
+DIST_DIR = STATIC_DIR / "dist"
+MANIFEST_NAME = "manifest.json"
+PRECOMPRESS_SUFFIXES = (".js", ".css", ".html", ".svg", ".json", ".txt")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+ENCODING_EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+
+def hashed_name(relative_path: Path, content: bytes) -> Path:
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return relative_path.with_name(f"{relative_path.stem}.{digest}{relative_path.suffix}")
+
+
+def build_static_assets(static_dir: Path = STATIC_DIR, dist_dir: Path = DIST_DIR) -> dict:
+    manifest = {}
+    for source in sorted(static_dir.rglob("*")):
+        if not source.is_file() or dist_dir in source.parents:
+            continue
+        relative = source.relative_to(static_dir)
+        content = source.read_bytes()
+        target = dist_dir / hashed_name(relative, content)
+        manifest[relative.as_posix()] = target.relative_to(dist_dir).as_posix()
+        if target.exists():
+            # Same name means same content, already built
+            continue
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, target)
+        if source.suffix in PRECOMPRESS_SUFFIXES:
+            Path(f"{target}.gz").write_bytes(gzip.compress(content, compresslevel=9))
+            if brotli is not None:
+                Path(f"{target}.br").write_bytes(brotli.compress(content, quality=11))
+
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    (dist_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+def load_manifest(dist_dir: Path = DIST_DIR) -> dict:
+    # Written by the bootstrap step; without it assets are served unhashed
+    try:
+        return json.loads((dist_dir / MANIFEST_NAME).read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def make_static_url(manifest: dict):
+    # Jinja helper: {{ static_url('js/main.js') }} resolves to the hashed
+    # build output, or the plain /static path when the asset wasn't built
+    def static_url(path: str) -> str:
+        built = manifest.get(path)
+        if built is None:
+            return f"/static/{path}"
+        return f"/static/dist/{built}"
+    return static_url
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    # Serves the content-hashed build output, choosing the .br or .gz
+    # sibling of a file when the client accepts that encoding
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        available = [
+            encoding for encoding in SUPPORTED_ENCODINGS
+            if os.path.isfile(f"{full_path}{ENCODING_EXTENSIONS[encoding]}")
+        ]
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""), available)
+
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if encoding is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        else:
+            encoded_path = f"{full_path}{ENCODING_EXTENSIONS[encoding]}"
+            headers["Content-Encoding"] = encoding
+            response = FileResponse(
+                encoded_path,
+                status_code=status_code,
+                headers=headers,
+                # Content type of the original file, not of the .gz/.br
+                media_type=mimetypes.guess_type(full_path)[0] or "text/plain"
+            )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    built = build_static_assets()
+    print(f"Built {len(built)} static assets into {DIST_DIR}")
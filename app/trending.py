@@ -0,0 +1,205 @@
+import asyncio
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from app.database import engine
+from app.models.models import Review
+
+# "Trending now": every review adds 1 to its movie's score, and scores
+# halve every TRENDING_HALF_LIFE_HOURS.
+#
+# Decay is lazy. A review written at time t adds 2 ** ((t - epoch) / half
+# life) instead of 1, so old scores never have to be touched: all of them
+# decay by the same factor, which leaves the ranking unchanged, and the
+# decayed value is the stored one times 2 ** (-(now - epoch) / half life).
+# Once the weights get large the scores are rescaled onto a new epoch and
+# the ones that have decayed to nothing are dropped.
+#
+# Reviews count from their created_at, so importing old ratings doesn't
+# make anything trend. They reach the engine like the leaderboards get
+# theirs: by reading reviews above the last id seen. The scores are
+# snapshotted to TRENDING_SNAPSHOT_PATH so a restart only reads the
+# reviews written since, instead of the whole table.
+
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "24"))
+TRENDING_SIZE = int(os.getenv("TRENDING_SIZE", "100"))
+TRENDING_REFRESH_SECONDS = float(os.getenv("TRENDING_REFRESH_SECONDS", "2"))
+TRENDING_SNAPSHOT_PATH = os.getenv("TRENDING_SNAPSHOT_PATH", "trending.snapshot.json")
+TRENDING_SNAPSHOT_SECONDS = float(os.getenv("TRENDING_SNAPSHOT_SECONDS", "300"))
+# Rescale once new reviews weigh 2 ** REBASE_HALF_LIVES, well inside float range
+REBASE_HALF_LIVES = 64
+# Decayed scores below this are dropped when rescaling
+MIN_SCORE = 1e-3
+READ_CHUNK = 100_000
+
+# reviews.created_at as unix seconds, computed by SQLite
+_created_epoch = (func.julianday(Review.created_at) - 2440587.5) * 86400.0
+
+
+class TrendingScores:
+    def __init__(self, engine: Engine, half_life_hours: float = TRENDING_HALF_LIFE_HOURS,
+                 snapshot_path: str = TRENDING_SNAPSHOT_PATH, refresh_seconds: float = TRENDING_REFRESH_SECONDS):
+        self.engine = engine
+        self.half_life = half_life_hours * 3600
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.scores = {}
+        self.epoch = time.time()
+        self.last_review_id = None
+        self.top = []
+        self.refreshed_at = 0.0
+        self.snapshot_at = 0.0
+        self.reviews_seen = 0
+        self.refreshes = 0
+        self.rebases = 0
+        self.snapshots = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.refreshed_at > 0
+
+    def _weight(self, timestamp: float) -> float:
+        return 2.0 ** ((timestamp - self.epoch) / self.half_life)
+
+    def add(self, movie_id: int, timestamp: float):
+        # O(1): no other movie's score is touched
+        self.scores[movie_id] = self.scores.get(movie_id, 0.0) + self._weight(timestamp)
+
+    def _rebase(self, now: float):
+        factor = 2.0 ** (-(now - self.epoch) / self.half_life)
+        self.scores = {
+            movie_id: score * factor for movie_id, score in self.scores.items() if score * factor >= MIN_SCORE
+        }
+        self.epoch = now
+        self.rebases += 1
+
+    def load_snapshot(self) -> bool:
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return False
+        try:
+            snapshot = json.loads(self.snapshot_path.read_text())
+        except (OSError, ValueError) as exc:
+            print(f"Ignoring trending snapshot {self.snapshot_path}: {exc!r}")
+            return False
+        if snapshot.get("half_life") != self.half_life:
+            return False
+        with self.engine.connect() as conn:
+            last_review_id = conn.execute(select(func.max(Review.id))).scalar() or 0
+        # A snapshot from ahead of this database belongs to another one
+        if snapshot["last_review_id"] > last_review_id:
+            return False
+        self.scores = {int(movie_id): score for movie_id, score in snapshot["scores"].items()}
+        self.epoch = snapshot["epoch"]
+        self.last_review_id = snapshot["last_review_id"]
+        # An old snapshot's epoch is too far back to add new reviews to
+        now = time.time()
+        if (now - self.epoch) / self.half_life >= REBASE_HALF_LIVES:
+            self._rebase(now)
+        return True
+
+    def save_snapshot(self):
+        if self.snapshot_path is None or not self.ready:
+            return
+        with self._lock:
+            snapshot = {
+                "half_life": self.half_life,
+                "epoch": self.epoch,
+                "last_review_id": self.last_review_id,
+                "scores": self.scores.copy(),
+            }
+        # Written next to the target and renamed over it, so a crash never
+        # leaves half a snapshot behind
+        partial = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        partial.write_text(json.dumps(snapshot))
+        os.replace(partial, self.snapshot_path)
+        self.snapshot_at = time.time()
+        self.snapshots += 1
+
+    def refresh(self):
+        if self.last_review_id is None and not self.load_snapshot():
+            self.last_review_id = 0
+        now = time.time()
+        # Reviews older than this would only add scores below MIN_SCORE
+        horizon = now - self.half_life * math.log2(1 / MIN_SCORE)
+        # The first refresh ranks whatever the snapshot held
+        changed = not self.ready
+        # Rescaled before adding, or the new weights could overflow a float
+        # after a long idle period
+        with self._lock:
+            if (now - self.epoch) / self.half_life >= REBASE_HALF_LIVES:
+                self._rebase(now)
+                changed = True
+        with self.engine.connect() as conn:
+            while True:
+                rows = conn.execute(
+                    select(Review.id, Review.movie_id, _created_epoch)
+                    .where(Review.id > self.last_review_id, Review.movie_id.is_not(None))
+                    .order_by(Review.id)
+                    .limit(READ_CHUNK)
+                ).all()
+                if not rows:
+                    break
+                with self._lock:
+                    for _, movie_id, created in rows:
+                        if created is None or created > now:
+                            # Clock skew must not push a review into the future
+                            created = now
+                        if created >= horizon:
+                            self.add(movie_id, created)
+                    self.last_review_id = rows[-1][0]
+                self.reviews_seen += len(rows)
+                changed = True
+        with self._lock:
+            if changed:
+                self.top = heapq.nlargest(TRENDING_SIZE, self.scores.items(), key=lambda item: (item[1], item[0]))
+            self.refreshed_at = now
+        self.refreshes += 1
+        if time.time() - self.snapshot_at >= TRENDING_SNAPSHOT_SECONDS:
+            self.save_snapshot()
+
+    def refresh_if_due(self):
+        # Only the first refresh makes callers wait
+        if not self._refresh_lock.acquire(blocking=not self.ready):
+            return
+        try:
+            if not self.ready or time.time() - self.refreshed_at >= self.refresh_seconds:
+                self.refresh()
+        finally:
+            self._refresh_lock.release()
+
+    async def ensure_fresh(self):
+        if self.ready and time.time() - self.refreshed_at < self.refresh_seconds:
+            return
+        await asyncio.to_thread(self.refresh_if_due)
+
+    def trending(self, limit: int = TRENDING_SIZE) -> list:
+        # [(movie_id, decayed score)], hottest first
+        factor = 2.0 ** (-(time.time() - self.epoch) / self.half_life)
+        with self._lock:
+            top = self.top[:min(limit, TRENDING_SIZE)]
+        return [(movie_id, score * factor) for movie_id, score in top]
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "half_life_hours": self.half_life / 3600,
+            "movies": len(self.scores),
+            "last_review_id": self.last_review_id,
+            "reviews_seen": self.reviews_seen,
+            "refreshes": self.refreshes,
+            "rebases": self.rebases,
+            "snapshots": self.snapshots,
+            "snapshot_at": self.snapshot_at,
+            "refreshed_at": self.refreshed_at,
+        }
+
+
+trending = TrendingScores(engine)